@@ -174,4 +174,12 @@ class ConfigLoader:
                 if phase not in valid_phases and phase != "all":
                     return False
 
+        # Validate protected branches: a branch name or a list of them
+        protected_branches = config.get("protected_branches")
+        if protected_branches is not None and not isinstance(protected_branches, str):
+            if not isinstance(protected_branches, list) or not all(
+                isinstance(branch, str) for branch in protected_branches
+            ):
+                return False
+
         return True
@@ -2,18 +2,56 @@
 Project detection system for RuleHawk
 """
 
+import copy
+import functools
+import importlib
+import os
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
-from .cpp_detector import CppDetector
-from .javascript_detector import JavaScriptDetector
-from .python_detector import PythonDetector
+# The detectors (and tomli, which the Python detector needs) are imported on
+# first use, so importing this package for invalidate_detection() is cheap
+_DETECTOR_MODULES = {
+    "PythonDetector": ".python_detector",
+    "JavaScriptDetector": ".javascript_detector",
+    "CppDetector": ".cpp_detector",
+}
+
+# How long a detection result stays fresh, in seconds; the root fingerprint
+# catches config file edits sooner, but not files in subdirectories
+_DETECTION_TTL = 30.0
+
+# Detection results keyed by resolved project root, with the monotonic time
+# they were recorded and the root fingerprint they were detected from
+_detection_cache: Dict[str, Tuple[float, FrozenSet[Tuple[str, int, int]], Dict[str, Any]]] = {}
+
+
+def _root_fingerprint(root: str) -> Optional[FrozenSet[Tuple[str, int, int]]]:
+    """Name, mtime and size of each entry directly in a project root"""
+    fingerprint = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # A dangling symlink still has its own mtime
+                    stat = entry.stat(follow_symlinks=False)
+                fingerprint.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    except OSError:
+        return None
+    return frozenset(fingerprint)
 
 
 def detect_project(project_root: Path = None) -> Dict[str, Any]:
     """
     Detect project type and configuration
 
+    Results are cached briefly per project root, and detected again as soon
+    as a file directly in the root (pyproject.toml, package.json, a
+    lockfile) changes. Each call returns its own copy.
+
     Args:
         project_root: Project root directory (defaults to current directory)
 
@@ -23,13 +61,51 @@ def detect_project(project_root: Path = None) -> Dict[str, Any]:
     if project_root is None:
         project_root = Path.cwd()
 
-    detectors = [
-        PythonDetector(project_root),
-        JavaScriptDetector(project_root),
-        CppDetector(project_root),
-    ]
+    key = str(Path(project_root).resolve())
+    fingerprint = _root_fingerprint(key)
+    cached = _detection_cache.get(key)
+    if (
+        cached is None
+        or fingerprint is None
+        or cached[1] != fingerprint
+        or time.monotonic() - cached[0] >= _DETECTION_TTL
+    ):
+        cached = (time.monotonic(), fingerprint, _detect_project_uncached(Path(key)))
+        if fingerprint is not None:
+            _detection_cache[key] = cached
+    return copy.deepcopy(cached[2])
+
+
+def invalidate_detection(project_root: Optional[Path] = None):
+    """
+    Drop cached detection results
+
+    Args:
+        project_root: Project whose result to drop (defaults to all projects)
+    """
+    if project_root is None:
+        _detection_cache.clear()
+    else:
+        _detection_cache.pop(str(Path(project_root).resolve()), None)
+
+
+def __getattr__(name: str):
+    """Import detector classes on first access"""
+    if name in _DETECTOR_MODULES:
+        return getattr(importlib.import_module(_DETECTOR_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _detector_classes() -> Tuple[type, ...]:
+    """Detector classes in the order they are tried"""
+    return tuple(__getattr__(name) for name in _DETECTOR_MODULES)
+
 
-    for detector in detectors:
+def _detect_project_uncached(project_root: Path) -> Dict[str, Any]:
+    """Run each language detector until one recognises the project"""
+    for detector_class in _detector_classes():
+        detector = detector_class(project_root)
         if detector.detect():
             return detector.analyze()
 
@@ -45,4 +121,10 @@ def detect_project(project_root: Path = None) -> Dict[str, Any]:
     }
 
 
-__all__ = ["detect_project", "PythonDetector", "JavaScriptDetector", "CppDetector"]
+__all__ = [
+    "detect_project",
+    "invalidate_detection",
+    "PythonDetector",
+    "JavaScriptDetector",
+    "CppDetector",
+]
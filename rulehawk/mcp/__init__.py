@@ -12,6 +12,7 @@ try:
     from .server import RuleHawkMCPServer
     from .tools import (
         check_tool_installed,
+        clear_tool_cache,
         detect_project,
         find_test_runner,
         suggest_configuration,
@@ -24,6 +25,7 @@ try:
         "test_command",
         "find_test_runner",
         "check_tool_installed",
+        "clear_tool_cache",
         "suggest_configuration",
     ]
     MCP_AVAILABLE = True
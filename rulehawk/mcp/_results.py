@@ -0,0 +1,24 @@
+"""Tool result helpers shared by the RuleHawk MCP servers."""
+
+import json
+from typing import Any
+
+try:
+    from mcp.types import TextContent, ToolResult
+except ImportError:
+    # Stub classes if MCP not available, so the interactive server still runs
+    class TextContent:
+        def __init__(self, *args, **kwargs):
+            self.text = kwargs.get("text", "")
+            self.type = kwargs.get("type", "text")
+
+    class ToolResult:
+        def __init__(self, *args, **kwargs):
+            self.content = kwargs.get("content", [])
+            self.is_error = kwargs.get("is_error", False)
+
+
+def _text_result(payload: Any, is_error: bool = False) -> ToolResult:
+    """Wrap a message or JSON-serialisable payload in a single-text-item ToolResult."""
+    text = payload if isinstance(payload, str) else json.dumps(payload, indent=2)
+    return ToolResult(content=[TextContent(type="text", text=text)], is_error=is_error)
@@ -1,21 +1,23 @@
 """Interactive MCP Server for RuleHawk - Learns from agents."""
 
 import asyncio
-import json
+import functools
 import logging
-import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
 
 from ..detection import detect_project
 from ..memory import RuleHawkMemory
 from ..verifier import CommandVerifier
+from ._results import ToolResult, _text_result
+from .tools import clear_tool_cache
 
 # Try to import MCP dependencies
 MCP_AVAILABLE = False
 try:
     from mcp import Server, Tool
-    from mcp.types import TextContent, ToolResult
 
     MCP_AVAILABLE = True
 except ImportError:
@@ -28,19 +30,70 @@ except ImportError:
         def __init__(self, *args, **kwargs):
             pass
 
-    class TextContent:
-        def __init__(self, *args, **kwargs):
-            self.text = kwargs.get("text", "")
-            self.type = kwargs.get("type", "text")
-
-    class ToolResult:
-        def __init__(self, *args, **kwargs):
-            self.content = kwargs.get("content", [])
-            self.is_error = kwargs.get("is_error", False)
-
 
 logger = logging.getLogger(__name__)
 
+# Command intents RuleHawk understands, mapped to their memory keys
+_INTENT_TO_CMD = {
+    intent: f"{intent.upper()}_CMD" for intent in ("test", "lint", "format", "coverage", "build")
+}
+
+# How much trailing stdout/stderr run_command reports back to the agent
+_OUTPUT_TAIL_BYTES = 1000
+
+# Unanswered asks allowed per command type before ask_command gives up
+_MAX_ASKS = 3
+
+# Asked once per intent learn_project still needs; the agent fills in the intent
+_QUESTION_TEMPLATE = "What command should I use for {}?"
+
+# Ways an agent can respond to a status report
+_REPORT_OPTIONS = ("fix_issues", "skip_failures", "add_exceptions", "abort")
+
+# Suggested commands per intent and language, offered when RuleHawk needs help
+_SUGGESTIONS: Mapping[str, Mapping[str, Tuple[str, ...]]] = {
+    "test": {
+        "python": ("pytest", "python -m pytest", "uv run pytest", "python -m unittest"),
+        "javascript": ("npm test", "yarn test", "jest", "mocha"),
+        "rust": ("cargo test",),
+        "go": ("go test ./...",),
+        "java": ("mvn test", "gradle test"),
+    },
+    "lint": {
+        "python": ("ruff check .", "pylint", "flake8", "uv run ruff check ."),
+        "javascript": ("eslint .", "npm run lint", "standard"),
+        "rust": ("cargo clippy",),
+        "go": ("golangci-lint run",),
+        "java": ("mvn checkstyle:check",),
+    },
+    "format": {
+        "python": ("black .", "ruff format .", "autopep8", "uv run black ."),
+        "javascript": ("prettier --write .", "npm run format"),
+        "rust": ("cargo fmt",),
+        "go": ("go fmt ./...", "gofumpt -w ."),
+        "java": ("mvn formatter:format",),
+    },
+}
+
+
+async def _run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the default executor (asyncio.to_thread needs 3.9)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int = _OUTPUT_TAIL_BYTES) -> str:
+    """Drain a subprocess stream, keeping only its last ``limit`` bytes."""
+    tail = bytearray()
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return tail.decode("utf-8", errors="replace")
+
 
 class InteractiveRuleHawkMCP:
     """Interactive MCP server where RuleHawk asks agents for help."""
@@ -55,6 +108,19 @@ class InteractiveRuleHawkMCP:
         self.project_root = project_root or Path.cwd()
         self.memory = RuleHawkMemory(self.project_root)
         self.verifier = CommandVerifier(self.project_root)
+        # Memory does file I/O, so it runs off the event loop on one thread
+        # that serialises every read and write of the learned commands
+        self._memory_executor = ThreadPoolExecutor(max_workers=1)
+        # Verified commands by type, kept in step with memory by the handlers;
+        # _trusted_cmds holds those confident enough to use without asking
+        self._known_cmds = self.memory.get_all_commands()
+        self._trusted_cmds = self.memory.get_trusted_commands()
+        # Bumped whenever known commands or project info change, so
+        # get_memory_status can reuse its last response while nothing has
+        self._state_version = 0
+        self._status_cache: Optional[Tuple[int, ToolResult]] = None
+        # Unanswered ask_command calls per command type, to break ask/teach loops
+        self._ask_counts: Dict[str, int] = defaultdict(int)
         self._setup_tools()
 
     def _setup_tools(self):
@@ -76,43 +142,50 @@ class InteractiveRuleHawkMCP:
                 ToolResult with agent's response
             """
             # Check if we already know this command
-            cmd_type = f"{request['intent'].upper()}_CMD"
-            existing = self.memory.get_command(cmd_type)
-
-            if existing:
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "already_known",
-                                    "command": existing,
-                                    "message": f"I already know to use: {existing}",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+            intent = request.get("intent")
+            cmd_type = _INTENT_TO_CMD.get(intent)
+            if cmd_type is None:
+                return self._unknown_intent(intent)
+
+            trusted = self._trusted_cmds.get(cmd_type)
+
+            if trusted:
+                existing, confidence = trusted
+                await self._run_memory(
+                    self.memory.log_event,
+                    "USE_LEARNED_CMD",
+                    type=cmd_type,
+                    command=existing,
+                    confidence=confidence,
+                )
+                return _text_result(
+                    {
+                        "status": "already_known",
+                        "command": existing,
+                        "message": f"I already know to use: {existing}",
+                    }
+                )
+
+            # Stop asking if the agent keeps failing to teach this command
+            self._ask_counts[cmd_type] += 1
+            if self._ask_counts[cmd_type] > _MAX_ASKS:
+                return _text_result(
+                    {
+                        "status": "abort",
+                        "message": f"Asked for the {intent} command {_MAX_ASKS} times without "
+                        "learning one. Stopping; configure it manually.",
+                    }
                 )
 
             # RuleHawk needs help
-            return ToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps(
-                            {
-                                "status": "need_answer",
-                                "question": request.get("question"),
-                                "context": request.get("context"),
-                                "suggestions": self._get_command_suggestions(request["intent"]),
-                                "message": "Please provide the command to use",
-                            },
-                            indent=2,
-                        ),
-                    )
-                ]
+            return _text_result(
+                {
+                    "status": "need_answer",
+                    "question": request.get("question"),
+                    "context": request.get("context"),
+                    "suggestions": self._get_command_suggestions(intent),
+                    "message": "Please provide the command to use",
+                }
             )
 
         @self.server.tool()
@@ -129,72 +202,60 @@ class InteractiveRuleHawkMCP:
             Returns:
                 ToolResult with verification status
             """
-            intent = request["intent"]
+            intent = request.get("intent")
             command = request["command"]
-            cmd_type = f"{intent.upper()}_CMD"
+            cmd_type = _INTENT_TO_CMD.get(intent)
+            if cmd_type is None:
+                return self._unknown_intent(intent)
 
             # Verify the command is safe and works
-            verification = self.verifier.verify_command(intent, command)
+            verification = await _run_blocking(self.verifier.verify_command, intent, command)
 
             if not verification.safe:
-                self.memory.reject_command(command, "agent", verification.reason)
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "rejected",
-                                    "reason": verification.reason,
-                                    "message": "Command rejected for safety reasons",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                await self._run_memory(
+                    self.memory.reject_command, command, "agent", verification.reason
+                )
+                return _text_result(
+                    {
+                        "status": "rejected",
+                        "reason": verification.reason,
+                        "message": "Command rejected for safety reasons",
+                    }
                 )
 
             if not verification.valid:
-                self.memory.reject_command(command, "agent", verification.reason)
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "invalid",
-                                    "reason": verification.reason,
-                                    "message": "Command doesn't appear to work correctly",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                await self._run_memory(
+                    self.memory.reject_command, command, "agent", verification.reason
+                )
+                return _text_result(
+                    {
+                        "status": "invalid",
+                        "reason": verification.reason,
+                        "message": "Command doesn't appear to work correctly",
+                    }
                 )
 
             # Command is good! Learn it
             if request.get("save", True):
-                self.memory.learn_command(cmd_type, command, "agent")
-                self.memory.mark_command_verified(
-                    cmd_type, "agent_provided", {"duration_ms": verification.duration_ms}
+                await self._run_memory(
+                    self.memory.learn_and_verify,
+                    cmd_type,
+                    command,
+                    "agent",
+                    "agent_provided",
+                    {"duration_ms": verification.duration_ms},
                 )
-
-            return ToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps(
-                            {
-                                "status": "learned",
-                                "command": command,
-                                "verified": True,
-                                "duration_ms": verification.duration_ms,
-                                "message": f"Thanks! I'll use '{command}' for {intent}",
-                            },
-                            indent=2,
-                        ),
-                    )
-                ]
+                await self._refresh_known()
+            self._ask_counts.pop(cmd_type, None)
+
+            return _text_result(
+                {
+                    "status": "learned",
+                    "command": command,
+                    "verified": True,
+                    "duration_ms": verification.duration_ms,
+                    "message": f"Thanks! I'll use '{command}' for {intent}",
+                }
             )
 
         @self.server.tool()
@@ -207,53 +268,38 @@ class InteractiveRuleHawkMCP:
             # Detect what we can
             if request is None:
                 request = {}
-            detected = detect_project()
-            self.memory.set_project_info(**detected)
+            detected = await _run_blocking(detect_project)
+            await self._run_memory(self.memory.set_project_info, **detected)
+            self._state_version += 1
 
             # See what we already know
-            known_commands = self.memory.get_all_commands()
+            known_commands = dict(self._known_cmds)
 
             # Figure out what we need to learn
-            needed = []
-            for cmd_type in ["TEST_CMD", "LINT_CMD", "FORMAT_CMD", "COVERAGE_CMD", "BUILD_CMD"]:
-                if cmd_type not in known_commands:
-                    needed.append(cmd_type.replace("_CMD", "").lower())
+            needed = [
+                intent
+                for intent, cmd_type in _INTENT_TO_CMD.items()
+                if cmd_type not in known_commands
+            ]
 
             if not needed:
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "already_configured",
-                                    "known_commands": known_commands,
-                                    "message": "I already know all the commands for this project!",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                return _text_result(
+                    {
+                        "status": "already_configured",
+                        "known_commands": known_commands,
+                        "message": "I already know all the commands for this project!",
+                    }
                 )
 
-            return ToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps(
-                            {
-                                "status": "need_teaching",
-                                "detected": detected,
-                                "known_commands": known_commands,
-                                "questions": {
-                                    cmd: f"What command should I use for {cmd}?" for cmd in needed
-                                },
-                                "message": "Please teach me these commands for your project",
-                            },
-                            indent=2,
-                        ),
-                    )
-                ]
+            return _text_result(
+                {
+                    "status": "need_teaching",
+                    "detected": detected,
+                    "known_commands": known_commands,
+                    "needed": needed,
+                    "question_template": _QUESTION_TEMPLATE,
+                    "message": "Please teach me these commands for your project",
+                }
             )
 
         @self.server.tool()
@@ -272,27 +318,14 @@ class InteractiveRuleHawkMCP:
             Returns:
                 ToolResult with status report
             """
-            return ToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps(
-                            {
-                                "phase": request["phase"],
-                                "summary": f"{request['passed']} passed, {request['failed']} failed",
-                                "failures": request.get("failures", []),
-                                "question": request.get("question", "How should I proceed?"),
-                                "options": [
-                                    "fix_issues",
-                                    "skip_failures",
-                                    "add_exceptions",
-                                    "abort",
-                                ],
-                            },
-                            indent=2,
-                        ),
-                    )
-                ]
+            return _text_result(
+                {
+                    "phase": request["phase"],
+                    "summary": f"{request['passed']} passed, {request['failed']} failed",
+                    "failures": request.get("failures", []),
+                    "question": request.get("question", "How should I proceed?"),
+                    "options": _REPORT_OPTIONS,
+                }
             )
 
         @self.server.tool()
@@ -307,89 +340,98 @@ class InteractiveRuleHawkMCP:
             Returns:
                 ToolResult with execution result
             """
-            intent = request["intent"]
-            cmd_type = f"{intent.upper()}_CMD"
+            intent = request.get("intent")
+            cmd_type = _INTENT_TO_CMD.get(intent)
+            if cmd_type is None:
+                return self._unknown_intent(intent)
 
             # Get the learned command
-            command = self.memory.get_command(cmd_type)
+            command = await self._run_memory(self.memory.get_command, cmd_type)
 
             if not command:
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "unknown_command",
-                                    "message": f"I don't know how to {intent} yet. Please teach me first.",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                return _text_result(
+                    {
+                        "status": "unknown_command",
+                        "message": f"I don't know how to {intent} yet. Please teach me first.",
+                    }
                 )
 
-            # Execute the command
+            # Execute the command, keeping only the tail of its output
             try:
-                result = subprocess.run(
+                process = await asyncio.create_subprocess_shell(
                     command,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=300,  # 5 minute timeout
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
                     cwd=self.project_root,
                 )
-
-                success = result.returncode == 0
-                self.memory.update_command_result(cmd_type, success)
-
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "success" if success else "failure",
-                                    "command": command,
-                                    "exit_code": result.returncode,
-                                    "stdout": result.stdout[-1000:] if result.stdout else "",
-                                    "stderr": result.stderr[-1000:] if result.stderr else "",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                try:
+                    stdout, stderr, returncode = await asyncio.wait_for(
+                        asyncio.gather(
+                            _read_tail(process.stdout),
+                            _read_tail(process.stderr),
+                            process.wait(),
+                        ),
+                        timeout=300,  # 5 minute timeout
+                    )
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise
+
+                success = returncode == 0
+                await self._record_result(cmd_type, success)
+
+                return _text_result(
+                    {
+                        "status": "success" if success else "failure",
+                        "command": command,
+                        "exit_code": returncode,
+                        "stdout": stdout,
+                        "stderr": stderr,
+                    }
                 )
 
-            except subprocess.TimeoutExpired:
-                self.memory.update_command_result(cmd_type, False)
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "status": "timeout",
-                                    "command": command,
-                                    "message": "Command timed out after 5 minutes",
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+            except asyncio.TimeoutError:
+                await self._record_result(cmd_type, False)
+                return _text_result(
+                    {
+                        "status": "timeout",
+                        "command": command,
+                        "message": "Command timed out after 5 minutes",
+                    }
                 )
             except Exception as e:
-                self.memory.update_command_result(cmd_type, False)
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {"status": "error", "command": command, "error": str(e)}, indent=2
-                            ),
-                        )
-                    ]
-                )
+                await self._record_result(cmd_type, False)
+                return _text_result({"status": "error", "command": command, "error": str(e)})
+
+        @self.server.tool()
+        async def forget_command(request: Dict[str, Any]) -> ToolResult:
+            """Agent tells RuleHawk to forget a learned command, e.g. before re-teaching it.
+
+            Args:
+                request: {
+                    "intent": "test|lint|format|coverage|build"
+                }
+
+            Returns:
+                ToolResult confirming the command was forgotten
+            """
+            intent = request.get("intent")
+            cmd_type = _INTENT_TO_CMD.get(intent)
+            if cmd_type is None:
+                return self._unknown_intent(intent)
+
+            # The tool behind the command is probed afresh while re-learning
+            await self._run_memory(self.memory.clear_command, cmd_type, clear_tool_cache)
+            await self._refresh_known()
+            self._ask_counts.pop(cmd_type, None)
+
+            return _text_result(
+                {
+                    "status": "forgotten",
+                    "message": f"Forgot the {intent} command; ask_command will ask again",
+                }
+            )
 
         @self.server.tool()
         async def get_memory_status() -> ToolResult:
@@ -398,60 +440,84 @@ class InteractiveRuleHawkMCP:
             Returns:
                 ToolResult with memory information
             """
-            return ToolResult(
-                content=[
-                    TextContent(
-                        type="text",
-                        text=json.dumps(
-                            {
-                                "project_info": self.memory.get_project_info(),
-                                "known_commands": self.memory.get_all_commands(),
-                                "learned_file": str(self.memory.learned_file),
-                                "message": "This is what I know about the project",
-                            },
-                            indent=2,
-                        ),
-                    )
-                ]
+            if self._status_cache and self._status_cache[0] == self._state_version:
+                return self._status_cache[1]
+
+            result = _text_result(
+                {
+                    "project_info": self.memory.get_project_info(),
+                    "known_commands": self._known_cmds,
+                    "learned_file": str(self.memory.learned_file),
+                    "message": "This is what I know about the project",
+                }
             )
+            self._status_cache = (self._state_version, result)
+            return result
+
+    async def _run_memory(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking memory call on the dedicated memory thread.
+
+        Args:
+            func: Bound RuleHawkMemory method to call
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._memory_executor, functools.partial(func, *args, **kwargs)
+        )
 
-    def _get_command_suggestions(self, intent: str) -> List[str]:
+    async def _record_result(self, cmd_type: str, success: bool):
+        """Record a command run in memory and refresh the known commands.
+
+        Args:
+            cmd_type: Type of command that was run
+            success: Whether the command succeeded
+        """
+        await self._run_memory(self.memory.update_command_result, cmd_type, success)
+        await self._refresh_known()
+
+    async def _refresh_known(self):
+        """Reload the verified commands from memory and invalidate cached status."""
+        self._known_cmds = await self._run_memory(self.memory.get_all_commands)
+        self._trusted_cmds = await self._run_memory(self.memory.get_trusted_commands)
+        self._state_version += 1
+
+    def _unknown_intent(self, intent: Optional[str]) -> ToolResult:
+        """Build the rejection returned for an unrecognised command intent.
+
+        Args:
+            intent: The intent supplied by the agent
+
+        Returns:
+            ToolResult listing the supported intents
+        """
+        return _text_result(
+            {
+                "status": "unknown_intent",
+                "intent": intent,
+                "supported": list(_INTENT_TO_CMD),
+                "message": f"I don't recognise the intent '{intent}'",
+            },
+            is_error=True,
+        )
+
+    def _get_command_suggestions(self, intent: str) -> Sequence[str]:
         """Get command suggestions based on intent and project.
 
         Args:
             intent: Command intent (test, lint, etc.)
 
         Returns:
-            List of suggested commands
+            Sequence of suggested commands
         """
         project_info = self.memory.get_project_info()
         language = project_info.get("language", "")
 
-        suggestions = {
-            "test": {
-                "python": ["pytest", "python -m pytest", "uv run pytest", "python -m unittest"],
-                "javascript": ["npm test", "yarn test", "jest", "mocha"],
-                "rust": ["cargo test"],
-                "go": ["go test ./..."],
-                "java": ["mvn test", "gradle test"],
-            },
-            "lint": {
-                "python": ["ruff check .", "pylint", "flake8", "uv run ruff check ."],
-                "javascript": ["eslint .", "npm run lint", "standard"],
-                "rust": ["cargo clippy"],
-                "go": ["golangci-lint run"],
-                "java": ["mvn checkstyle:check"],
-            },
-            "format": {
-                "python": ["black .", "ruff format .", "autopep8", "uv run black ."],
-                "javascript": ["prettier --write .", "npm run format"],
-                "rust": ["cargo fmt"],
-                "go": ["go fmt ./...", "gofumpt -w ."],
-                "java": ["mvn formatter:format"],
-            },
-        }
-
-        return suggestions.get(intent, {}).get(language, [])
+        return _SUGGESTIONS.get(intent, {}).get(language, ())
 
     async def run(self):
         """Run the interactive MCP server."""
@@ -459,8 +525,14 @@ class InteractiveRuleHawkMCP:
             logger.error("MCP dependencies not available")
             return
 
-        async with self.server:
-            await self.server.wait_for_shutdown()
+        try:
+            async with self.server:
+                await self.server.wait_for_shutdown()
+        finally:
+            # Write deferred statistics and buffered log events in one go
+            # rather than leaving them to the interpreter's atexit hooks
+            await self._run_memory(self.memory.close)
+            self._memory_executor.shutdown(wait=True)
 
 
 def main():
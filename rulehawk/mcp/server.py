@@ -3,22 +3,68 @@ RuleHawk MCP Server implementation
 """
 
 import asyncio
-import json
-import sys
+import functools
 from pathlib import Path
+from typing import Any, Dict
 
 import yaml
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
+# Prefer the libyaml-backed C loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
 
 from mcp import Server
-from mcp.types import TextContent, ToolResult
+from mcp.types import ToolResult
 
+from ..detection import invalidate_detection
+from ._results import _text_result
 from .tools import check_tool_installed as check_tool
+from .tools import clear_tool_cache
+from .tools import detect_project as detect_proj
 from .tools import find_test_runner as find_runner
 from .tools import suggest_configuration as suggest_config
 from .tools import test_command as test_cmd
 
+# Phases a rules file may declare
+_VALID_PHASES = frozenset({"preflight", "inflight", "postflight", "security", "always"})
+
+
+@functools.lru_cache(maxsize=64)
+def _validate_rules_yaml(yaml_content: str) -> Dict[str, Any]:
+    """Parse and validate RuleHawk rules YAML, memoised on the document text"""
+    rules = yaml.load(yaml_content, Loader=SafeLoader)
+
+    # Basic validation
+    errors = []
+    warnings = []
+
+    if not isinstance(rules, dict):
+        errors.append("Rules must be a dictionary")
+        return {"valid": False, "errors": errors, "warnings": warnings}
+
+    for phase in rules.get("phases", {}):
+        if phase not in _VALID_PHASES:
+            warnings.append(f"Unknown phase: {phase}")
+
+    # Check each rule
+    for phase, phase_rules in rules.get("phases", {}).items():
+        if not isinstance(phase_rules, list):
+            errors.append(f"Phase {phase} must contain a list of rules")
+            continue
+
+        for i, rule in enumerate(phase_rules):
+            if "id" not in rule:
+                errors.append(f"Rule {i} in {phase} missing 'id' field")
+            if "description" not in rule:
+                warnings.append(f"Rule {rule.get('id', i)} missing description")
+            if "type" not in rule:
+                errors.append(f"Rule {rule.get('id', i)} missing 'type' field")
+
+    return {"valid": len(errors) == 0, "errors": errors, "warnings": warnings}
+
 
 class RuleHawkMCPServer:
     """MCP Server for RuleHawk - allows AI assistants to interact with RuleHawk"""
@@ -35,135 +81,70 @@ class RuleHawkMCPServer:
         async def detect_project() -> ToolResult:
             """Detect project type and configuration"""
             try:
-                config = detect_project(self.project_root)
-                return ToolResult(
-                    content=[TextContent(type="text", text=json.dumps(config, indent=2))]
-                )
+                config = detect_proj(self.project_root)
+                return _text_result(config)
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error detecting project: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error detecting project: {e}", is_error=True)
 
         @self.server.tool()
         async def test_command(command: str) -> ToolResult:
             """Test if a command works in the project"""
             try:
                 result = await test_cmd(command, self.project_root)
-                return ToolResult(
-                    content=[TextContent(type="text", text=json.dumps(result, indent=2))]
-                )
+                return _text_result(result)
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error testing command: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error testing command: {e}", is_error=True)
 
         @self.server.tool()
         async def find_test_runner() -> ToolResult:
             """Find the test runner for this project"""
             try:
                 runner_info = await find_runner(self.project_root)
-                return ToolResult(
-                    content=[TextContent(type="text", text=json.dumps(runner_info, indent=2))]
-                )
+                return _text_result(runner_info)
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error finding test runner: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error finding test runner: {e}", is_error=True)
 
         @self.server.tool()
         async def check_tool_installed(tool_name: str) -> ToolResult:
             """Check if a tool is installed"""
             try:
                 result = await check_tool(tool_name)
-                return ToolResult(
-                    content=[
-                        TextContent(
-                            type="text",
-                            text=json.dumps(
-                                {
-                                    "tool": tool_name,
-                                    "installed": result["installed"],
-                                    "path": result.get("path"),
-                                    "version": result.get("version"),
-                                },
-                                indent=2,
-                            ),
-                        )
-                    ]
+                return _text_result(
+                    {
+                        "tool": tool_name,
+                        "installed": result["installed"],
+                        "path": result.get("path"),
+                        "version": result.get("version"),
+                    }
                 )
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error checking tool: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error checking tool: {e}", is_error=True)
+
+        @self.server.tool()
+        async def refresh_tools() -> ToolResult:
+            """Forget cached tool checks and project detection so changes are picked up"""
+            clear_tool_cache()
+            invalidate_detection(self.project_root)
+            return _text_result({"refreshed": True})
 
         @self.server.tool()
         async def suggest_configuration() -> ToolResult:
             """Suggest RuleHawk configuration for this project"""
             try:
                 config = await suggest_config(self.project_root)
-                return ToolResult(
-                    content=[
-                        TextContent(type="text", text=yaml.dump(config, default_flow_style=False))
-                    ]
-                )
+                return _text_result(yaml.dump(config, Dumper=SafeDumper, default_flow_style=False))
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error suggesting configuration: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error suggesting configuration: {e}", is_error=True)
 
         @self.server.tool()
         async def validate_rules(yaml_content: str) -> ToolResult:
             """Validate RuleHawk rules YAML"""
             try:
-                import yaml
-
-                rules = yaml.safe_load(yaml_content)
-
-                # Basic validation
-                errors = []
-                warnings = []
-
-                if not isinstance(rules, dict):
-                    errors.append("Rules must be a dictionary")
-
-                valid_phases = ["preflight", "inflight", "postflight", "security", "always"]
-                for phase in rules.get("phases", {}):
-                    if phase not in valid_phases:
-                        warnings.append(f"Unknown phase: {phase}")
-
-                # Check each rule
-                for phase, phase_rules in rules.get("phases", {}).items():
-                    if not isinstance(phase_rules, list):
-                        errors.append(f"Phase {phase} must contain a list of rules")
-                        continue
-
-                    for i, rule in enumerate(phase_rules):
-                        if "id" not in rule:
-                            errors.append(f"Rule {i} in {phase} missing 'id' field")
-                        if "description" not in rule:
-                            warnings.append(f"Rule {rule.get('id', i)} missing description")
-                        if "type" not in rule:
-                            errors.append(f"Rule {rule.get('id', i)} missing 'type' field")
-
-                result = {"valid": len(errors) == 0, "errors": errors, "warnings": warnings}
-
-                return ToolResult(
-                    content=[TextContent(type="text", text=json.dumps(result, indent=2))]
-                )
+                return _text_result(_validate_rules_yaml(yaml_content))
             except yaml.YAMLError as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"YAML parse error: {e}")], is_error=True
-                )
+                return _text_result(f"YAML parse error: {e}", is_error=True)
             except Exception as e:
-                return ToolResult(
-                    content=[TextContent(type="text", text=f"Error validating rules: {e}")],
-                    is_error=True,
-                )
+                return _text_result(f"Error validating rules: {e}", is_error=True)
 
     async def run(self):
         """Run the MCP server"""
@@ -3,47 +3,21 @@ MCP tool implementations for RuleHawk
 """
 
 import asyncio
-import sys
+import os
+import re
+import shlex
+import shutil
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
-from rulehawk.detection.cpp_detector import CppDetector
-from rulehawk.detection.javascript_detector import JavaScriptDetector
-from rulehawk.detection.python_detector import PythonDetector
-
-
-def detect_project(project_root: Path) -> Dict[str, Any]:
-    """Detect project type and configuration"""
-    detectors = [
-        PythonDetector(project_root),
-        JavaScriptDetector(project_root),
-        CppDetector(project_root),
-    ]
-
-    for detector in detectors:
-        if detector.detect():
-            return detector.analyze()
-
-    # Fallback - unknown project type
-    return {
-        "language": "unknown",
-        "message": "Could not detect project type",
-        "suggestions": [
-            "Add a package.json for JavaScript/TypeScript",
-            "Add a setup.py or pyproject.toml for Python",
-            "Add a Makefile or CMakeLists.txt for C/C++",
-        ],
-    }
+from ..detection import detect_project
 
 
 async def test_command(command: str, cwd: Path) -> Dict[str, Any]:
     """Test if a command works"""
     try:
         # Parse command into parts
-        import shlex
-
         cmd_parts = shlex.split(command)
 
         # Run command with timeout
@@ -74,6 +48,11 @@ async def test_command(command: str, cwd: Path) -> Dict[str, Any]:
                 "error": "Command timed out after 10 seconds",
                 "suggestion": "Command may be waiting for input or running too long",
             }
+        except asyncio.CancelledError:
+            # Don't leave the child running when a caller gives up on it
+            process.kill()
+            await process.wait()
+            raise
 
     except FileNotFoundError:
         return {
@@ -86,25 +65,72 @@ async def test_command(command: str, cwd: Path) -> Dict[str, Any]:
         return {"command": command, "success": False, "error": str(e)}
 
 
+# Most probe commands run at once when searching for a test runner
+_MAX_CONCURRENT_PROBES = 4
+
+
+async def _first_working_command(commands: List[str], cwd: Path) -> Optional[int]:
+    """Probe commands concurrently, returning the index of the first that works
+
+    Commands are listed in order of preference. Once a command succeeds,
+    probes for the less preferred ones still running are cancelled.
+    """
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_PROBES)
+
+    async def probe(command: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await test_command(command, cwd)
+
+    tasks = [asyncio.ensure_future(probe(command)) for command in commands]
+    try:
+        for index, task in enumerate(tasks):
+            if (await task)["success"]:
+                return index
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# First dotted version number in a tool's --version output
+_VERSION_RE = re.compile(r"\d+\.\d+(?:\.\d+)?")
+
+# Error phrases that _get_command_suggestion reacts to, matched in one pass
+_ERROR_KIND_RE = re.compile(
+    r"(?P<not_found>not found)|(?P<no_such_file>no such file or directory)|(?P<module>module)",
+    re.IGNORECASE,
+)
+
+# (substring of the command, suggestion) for tools that were not found
+_MISSING_TOOL_HINTS = (
+    ("npm", "Try: npm install"),
+    ("pytest", "Try: pip install pytest"),
+    ("jest", "Try: npm install --save-dev jest"),
+)
+
+# (substring of the error, suggestion) for missing project files
+_MISSING_FILE_HINTS = (
+    ("package.json", "No package.json found. Run: npm init"),
+    ("requirements.txt", "No requirements.txt found. Create one or use pyproject.toml"),
+)
+
+
 def _get_command_suggestion(command: str, error: str) -> Optional[str]:
     """Get suggestion based on error message"""
-    error_lower = error.lower()
-
-    if "not found" in error_lower or "command not found" in error_lower:
-        if "npm" in command:
-            return "Try: npm install"
-        elif "pytest" in command:
-            return "Try: pip install pytest"
-        elif "jest" in command:
-            return "Try: npm install --save-dev jest"
-
-    if "no such file or directory" in error_lower:
-        if "package.json" in error:
-            return "No package.json found. Run: npm init"
-        elif "requirements.txt" in error:
-            return "No requirements.txt found. Create one or use pyproject.toml"
-
-    if "module" in error_lower and "not found" in error_lower:
+    kinds = {match.lastgroup for match in _ERROR_KIND_RE.finditer(error)}
+
+    if "not_found" in kinds:
+        for needle, suggestion in _MISSING_TOOL_HINTS:
+            if needle in command:
+                return suggestion
+
+    if "no_such_file" in kinds:
+        for needle, suggestion in _MISSING_FILE_HINTS:
+            if needle in error:
+                return suggestion
+
+    if "module" in kinds and "not_found" in kinds:
         return "Missing dependencies. Try installing project dependencies first"
 
     return None
@@ -114,14 +140,10 @@ async def find_test_runner(project_root: Path) -> Dict[str, Any]:
     """Find and validate test runner for project"""
     project_config = detect_project(project_root)
 
-    if project_config["language"] == "python":
-        return await _find_python_test_runner(project_root, project_config)
-    elif project_config["language"] == "javascript":
-        return await _find_js_test_runner(project_root, project_config)
-    elif project_config["language"] == "c++":
-        return await _find_cpp_test_runner(project_root, project_config)
-    else:
+    finder = _TEST_RUNNER_FINDERS.get(project_config["language"])
+    if finder is None:
         return {"found": False, "message": "Unknown project type"}
+    return await finder(project_root, project_config)
 
 
 async def _find_python_test_runner(project_root: Path, config: Dict) -> Dict[str, Any]:
@@ -163,10 +185,12 @@ async def _find_python_test_runner(project_root: Path, config: Dict) -> Dict[str
         ("python manage.py test", "django"),
     ]
 
-    for cmd, framework in commands_to_try:
-        result = await test_command(cmd + " --help", project_root)
-        if result["success"]:
-            return {"found": True, "framework": framework, "command": cmd, "detected": True}
+    index = await _first_working_command(
+        [cmd + " --help" for cmd, _ in commands_to_try], project_root
+    )
+    if index is not None:
+        cmd, framework = commands_to_try[index]
+        return {"found": True, "framework": framework, "command": cmd, "detected": True}
 
     return {
         "found": False,
@@ -212,10 +236,12 @@ async def _find_js_test_runner(project_root: Path, config: Dict) -> Dict[str, An
         ("mocha", "mocha"),
     ]
 
-    for cmd, framework in commands_to_try:
-        result = await test_command(cmd + " --help", project_root)
-        if result["success"]:
-            return {"found": True, "framework": framework, "command": cmd, "detected": True}
+    index = await _first_working_command(
+        [cmd + " --help" for cmd, _ in commands_to_try], project_root
+    )
+    if index is not None:
+        cmd, framework = commands_to_try[index]
+        return {"found": True, "framework": framework, "command": cmd, "detected": True}
 
     return {
         "found": False,
@@ -245,6 +271,8 @@ async def _find_cpp_test_runner(project_root: Path, config: Dict) -> Dict[str, A
     # Try common test commands
     commands_to_try = ["ctest", "make test", "make check", "./test", "./run_tests"]
 
+    # These run the actual test targets rather than a --help probe, so they stay
+    # serial: concurrent make invocations would race on the same build tree
     for cmd in commands_to_try:
         result = await test_command(cmd, project_root)
         if result["success"]:
@@ -261,62 +289,175 @@ async def _find_cpp_test_runner(project_root: Path, config: Dict) -> Dict[str, A
     }
 
 
-async def check_tool_installed(tool_name: str) -> Dict[str, Any]:
-    """Check if a tool is installed and get version"""
-    try:
-        # Common version flags
-        version_flags = ["--version", "-v", "version", "-V"]
+# Test runner search for each detected language
+_TEST_RUNNER_FINDERS = {
+    "python": _find_python_test_runner,
+    "javascript": _find_js_test_runner,
+    "c++": _find_cpp_test_runner,
+}
 
-        for flag in version_flags:
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    tool_name, flag, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-                )
 
-                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=2.0)
+# How long a check_tool_installed result stays fresh, in seconds
+_TOOL_CACHE_TTL = 30.0
 
-                if process.returncode == 0:
-                    version_output = stdout.decode("utf-8", errors="replace")
-                    if not version_output:
-                        version_output = stderr.decode("utf-8", errors="replace")
+# Results of check_tool_installed keyed by (tool name, PATH), with the
+# monotonic time they were recorded
+_tool_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
 
-                    # Try to extract version
-                    import re
 
-                    version_match = re.search(r"\d+\.\d+(?:\.\d+)?", version_output)
-                    version = version_match.group(0) if version_match else "unknown"
+async def check_tool_installed(tool_name: str) -> Dict[str, Any]:
+    """Check if a tool is installed and get version (cached briefly per tool and PATH)"""
+    key = (tool_name, os.environ.get("PATH", ""))
+    cached = _tool_cache.get(key)
+    if cached is None or time.monotonic() - cached[0] >= _TOOL_CACHE_TTL:
+        cached = _tool_cache[key] = (time.monotonic(), await _probe_tool(tool_name))
+    return dict(cached[1])
 
-                    # Get path
-                    which_process = await asyncio.create_subprocess_exec(
-                        "which",
-                        tool_name,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE,
-                    )
 
-                    which_stdout, _ = await which_process.communicate()
-                    path = (
-                        which_stdout.decode("utf-8").strip()
-                        if which_process.returncode == 0
-                        else None
-                    )
+def clear_tool_cache(tool_name: Optional[str] = None):
+    """Forget cached check_tool_installed results, e.g. after installing tools
 
-                    return {"installed": True, "version": version, "path": path}
+    Args:
+        tool_name: Only forget results for this tool (defaults to all tools)
+    """
+    if tool_name is None:
+        _tool_cache.clear()
+        return
+    for key in [key for key in _tool_cache if key[0] == tool_name]:
+        del _tool_cache[key]
 
-            except (TimeoutError, Exception):
-                continue
 
-        return {
-            "installed": False,
-            "error": f"{tool_name} not found or not responding to version flags",
-        }
+async def _probe_tool(tool_name: str) -> Dict[str, Any]:
+    """Run the tool's version flags to see whether it is installed"""
+    try:
+        # Nearly every tool answers --version; only fall back to the other
+        # common flags when it doesn't, probing those concurrently
+        version_output = await _run_version_flag(tool_name, "--version")
+        if version_output is None:
+            fallbacks = await asyncio.gather(
+                *(_run_version_flag(tool_name, flag) for flag in ("-v", "version", "-V"))
+            )
+            version_output = next((out for out in fallbacks if out is not None), None)
+
+        if version_output is None:
+            return {
+                "installed": False,
+                "error": f"{tool_name} not found or not responding to version flags",
+            }
+
+        # Try to extract version
+        version_match = _VERSION_RE.search(version_output)
+        version = version_match.group(0) if version_match else "unknown"
+
+        return {"installed": True, "version": version, "path": shutil.which(tool_name)}
 
-    except FileNotFoundError:
-        return {"installed": False, "error": f"{tool_name} not found"}
     except Exception as e:
         return {"installed": False, "error": str(e)}
 
 
+async def _run_version_flag(tool_name: str, flag: str) -> Optional[str]:
+    """Run `tool_name flag`, returning its output if it exits cleanly"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            tool_name, flag, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except Exception:
+        return None
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=2.0)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+
+    if process.returncode != 0:
+        return None
+
+    output = stdout.decode("utf-8", errors="replace")
+    return output or stderr.decode("utf-8", errors="replace")
+
+
+# Rule skeletons for suggest_configuration. Rules whose command depends on
+# the project are built as {**skeleton, "command": ...}; fully constant
+# rules are shared, so callers must not mutate a suggested config in place.
+_TEST_RULE = {"id": "TEST-01", "type": "command", "description": "All tests must pass"}
+_BUILD_RULE = {
+    "id": "BUILD-01",
+    "type": "command",
+    "description": "Project must build successfully",
+}
+_TYPE_RULE = {"id": "TYPE-01", "type": "command", "description": "Code must pass type checking"}
+
+_PYTHON_LINT_RULES = {
+    "ruff": {"id": "LINT-01", "type": "command", "description": "Code must pass ruff checks"},
+    "flake8": {"id": "LINT-02", "type": "command", "description": "Code must pass flake8 checks"},
+}
+_PYTHON_FORMAT_RULES = {
+    "black": {
+        "id": "FMT-01",
+        "type": "command",
+        "description": "Code must be formatted with black",
+    },
+}
+_JS_LINT_RULES = {
+    "eslint": {"id": "LINT-01", "type": "command", "description": "Code must pass ESLint checks"},
+}
+_JS_FORMAT_RULES = {
+    "prettier": {
+        "id": "FMT-01",
+        "type": "command",
+        "description": "Code must be formatted with Prettier",
+    },
+}
+
+_TS_TYPE_RULE = {
+    "id": "TYPE-01",
+    "type": "command",
+    "description": "TypeScript must compile without errors",
+    "command": "tsc --noEmit",
+}
+_CPP_STATIC_RULE = {
+    "id": "STATIC-01",
+    "type": "command",
+    "description": "Code must pass static analysis",
+    "command": "cppcheck --error-exitcode=1 src/",
+    "optional": True,
+}
+# Regexes for hard-coded secrets, suggested for the security phase
+_SECRET_PATTERNS = (
+    "api_key.*=.*['\"][A-Za-z0-9]{20,}['\"]",
+    "password.*=.*['\"][^'\"\\n]{8,}['\"]",
+)
+_SECURITY_RULES = [
+    {
+        "id": "SEC-01",
+        "type": "file_pattern",
+        "description": "No secrets in code",
+        "pattern": "**/*",
+        "forbidden": list(_SECRET_PATTERNS),
+    }
+]
+_ALWAYS_RULES = [
+    {
+        "id": "ALW-01",
+        "type": "file_pattern",
+        "description": "No large files",
+        "pattern": "**/*",
+        "max_size": "10MB",
+    }
+]
+
+
+# Phases that the language-specific rule builders fill in
+_LANGUAGE_PHASES = ("preflight", "inflight", "postflight")
+
+
+def _empty_phases() -> Dict[str, List]:
+    """Fresh phase -> rule list mapping for a rule builder"""
+    return {phase: [] for phase in _LANGUAGE_PHASES}
+
+
 async def suggest_configuration(project_root: Path) -> Dict[str, Any]:
     """Suggest RuleHawk configuration based on project"""
     project_config = detect_project(project_root)
@@ -325,109 +466,51 @@ async def suggest_configuration(project_root: Path) -> Dict[str, Any]:
     config = {"name": project_root.name, "version": "1.0.0", "phases": {}}
 
     # Language-specific rules
-    if project_config["language"] == "python":
-        config["phases"] = _get_python_rules(project_config)
-    elif project_config["language"] == "javascript":
-        config["phases"] = _get_js_rules(project_config)
-    elif project_config["language"] == "c++":
-        config["phases"] = _get_cpp_rules(project_config)
+    build_rules = _RULE_BUILDERS.get(project_config["language"])
+    if build_rules is not None:
+        config["phases"] = build_rules(project_config)
 
     # Add common rules
-    config["phases"]["security"] = [
-        {
-            "id": "SEC-01",
-            "type": "file_pattern",
-            "description": "No secrets in code",
-            "pattern": "**/*",
-            "forbidden": [
-                "api_key.*=.*['\"][A-Za-z0-9]{20,}['\"]",
-                "password.*=.*['\"][^'\"\\n]{8,}['\"]",
-            ],
-        }
-    ]
-
-    config["phases"]["always"] = [
-        {
-            "id": "ALW-01",
-            "type": "file_pattern",
-            "description": "No large files",
-            "pattern": "**/*",
-            "max_size": "10MB",
-        }
-    ]
+    config["phases"]["security"] = list(_SECURITY_RULES)
+    config["phases"]["always"] = list(_ALWAYS_RULES)
 
     return config
 
 
 def _get_python_rules(config: Dict) -> Dict[str, List]:
     """Get Python-specific rules"""
-    rules = {"preflight": [], "inflight": [], "postflight": []}
+    rules = _empty_phases()
 
     # Testing rules
     testing = config.get("testing", {})
     if testing.get("framework") == "pytest":
-        rules["postflight"].append(
-            {
-                "id": "TEST-01",
-                "type": "command",
-                "description": "All tests must pass",
-                "command": testing.get("test_command", "pytest"),
-            }
-        )
+        rules["postflight"].append({**_TEST_RULE, "command": testing.get("test_command", "pytest")})
 
     # Linting rules
     linting = config.get("linting", {})
     for tool in linting.get("tools", []):
-        if tool["name"] == "ruff":
-            rules["preflight"].append(
-                {
-                    "id": "LINT-01",
-                    "type": "command",
-                    "description": "Code must pass ruff checks",
-                    "command": tool["command"],
-                }
-            )
-        elif tool["name"] == "flake8":
-            rules["preflight"].append(
-                {
-                    "id": "LINT-02",
-                    "type": "command",
-                    "description": "Code must pass flake8 checks",
-                    "command": tool["command"],
-                }
-            )
+        skeleton = _PYTHON_LINT_RULES.get(tool["name"])
+        if skeleton:
+            rules["preflight"].append({**skeleton, "command": tool["command"]})
 
     # Formatting rules
     formatting = config.get("formatting", {})
     for tool in formatting.get("tools", []):
-        if tool["name"] == "black":
-            rules["preflight"].append(
-                {
-                    "id": "FMT-01",
-                    "type": "command",
-                    "description": "Code must be formatted with black",
-                    "command": tool["check_command"],
-                }
-            )
+        skeleton = _PYTHON_FORMAT_RULES.get(tool["name"])
+        if skeleton:
+            rules["preflight"].append({**skeleton, "command": tool["check_command"]})
 
     # Type checking
     type_checking = config.get("type_checking", {})
     if type_checking.get("enabled"):
-        rules["inflight"].append(
-            {
-                "id": "TYPE-01",
-                "type": "command",
-                "description": "Code must pass type checking",
-                "command": type_checking.get("command", "mypy"),
-            }
-        )
+        rules["inflight"].append({**_TYPE_RULE, "command": type_checking.get("command", "mypy")})
 
     return rules
 
 
 def _get_js_rules(config: Dict) -> Dict[str, List]:
     """Get JavaScript-specific rules"""
-    rules = {"preflight": [], "inflight": [], "postflight": []}
+    rules = _empty_phases()
 
     package_manager = config.get("package_manager", {})
     run_cmd = package_manager.get("run_cmd", "npm run")
@@ -435,104 +518,58 @@ def _get_js_rules(config: Dict) -> Dict[str, List]:
     # Testing
     testing = config.get("testing", {})
     if testing.get("test_command"):
-        rules["postflight"].append(
-            {
-                "id": "TEST-01",
-                "type": "command",
-                "description": "All tests must pass",
-                "command": f"{run_cmd} test",
-            }
-        )
+        rules["postflight"].append({**_TEST_RULE, "command": f"{run_cmd} test"})
 
     # Linting
     linting = config.get("linting", {})
     for tool in linting.get("tools", []):
-        if tool["name"] == "eslint":
-            rules["preflight"].append(
-                {
-                    "id": "LINT-01",
-                    "type": "command",
-                    "description": "Code must pass ESLint checks",
-                    "command": tool["command"],
-                }
-            )
+        skeleton = _JS_LINT_RULES.get(tool["name"])
+        if skeleton:
+            rules["preflight"].append({**skeleton, "command": tool["command"]})
 
     # Formatting
     formatting = config.get("formatting", {})
     for tool in formatting.get("tools", []):
-        if tool["name"] == "prettier":
-            rules["preflight"].append(
-                {
-                    "id": "FMT-01",
-                    "type": "command",
-                    "description": "Code must be formatted with Prettier",
-                    "command": tool.get("check_command", "prettier --check ."),
-                }
-            )
+        skeleton = _JS_FORMAT_RULES.get(tool["name"])
+        if skeleton:
+            command = tool.get("check_command", "prettier --check .")
+            rules["preflight"].append({**skeleton, "command": command})
 
     # TypeScript
     if config.get("variant") == "typescript":
-        rules["inflight"].append(
-            {
-                "id": "TYPE-01",
-                "type": "command",
-                "description": "TypeScript must compile without errors",
-                "command": "tsc --noEmit",
-            }
-        )
+        rules["inflight"].append(_TS_TYPE_RULE)
 
     # Build
     scripts = config.get("scripts", {})
     if "build" in scripts:
-        rules["postflight"].append(
-            {
-                "id": "BUILD-01",
-                "type": "command",
-                "description": "Project must build successfully",
-                "command": f"{run_cmd} build",
-            }
-        )
+        rules["postflight"].append({**_BUILD_RULE, "command": f"{run_cmd} build"})
 
     return rules
 
 
 def _get_cpp_rules(config: Dict) -> Dict[str, List]:
     """Get C++-specific rules"""
-    rules = {"preflight": [], "inflight": [], "postflight": []}
+    rules = _empty_phases()
 
     build_system = config.get("build_system", {})
 
     # Build rules
     if build_system.get("build_command"):
-        rules["postflight"].append(
-            {
-                "id": "BUILD-01",
-                "type": "command",
-                "description": "Project must build successfully",
-                "command": build_system["build_command"],
-            }
-        )
+        rules["postflight"].append({**_BUILD_RULE, "command": build_system["build_command"]})
 
     # Test rules
     if build_system.get("test_command"):
-        rules["postflight"].append(
-            {
-                "id": "TEST-01",
-                "type": "command",
-                "description": "All tests must pass",
-                "command": build_system["test_command"],
-            }
-        )
+        rules["postflight"].append({**_TEST_RULE, "command": build_system["test_command"]})
 
     # Static analysis
-    rules["preflight"].append(
-        {
-            "id": "STATIC-01",
-            "type": "command",
-            "description": "Code must pass static analysis",
-            "command": "cppcheck --error-exitcode=1 src/",
-            "optional": True,
-        }
-    )
+    rules["preflight"].append(_CPP_STATIC_RULE)
 
     return rules
+
+
+# Rule builder for each detected language
+_RULE_BUILDERS = {
+    "python": _get_python_rules,
+    "javascript": _get_js_rules,
+    "c++": _get_cpp_rules,
+}
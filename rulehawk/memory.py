@@ -1,15 +1,79 @@
 """RuleHawk Memory System - Persistent command learning and storage."""
 
+import atexit
+import functools
 import json
 import logging
+import mmap
+import os
+import threading
+import time
 import uuid
-from dataclasses import asdict, dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: saves are still atomic, just not locked against other processes
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Number of buffered audit log events that triggers a write
+_LOG_BATCH_SIZE = 64
+
+# Size, in bytes, at which the audit log is rotated to rulehawk-log.jsonl.1
+_LOG_MAX_BYTES = 10 * 1024 * 1024
+
+# The learned commands file is pretty-printed by default so it diffs and
+# blames well under version control; RULEHAWK_COMPACT_JSON=1 writes it compact
+_LEARNED_JSON_OPTIONS: Dict[str, Any] = (
+    {"separators": (",", ":")} if os.environ.get("RULEHAWK_COMPACT_JSON") == "1" else {"indent": 2}
+)
+
+# Quiet period, in seconds, before deferred changes are saved to disk
+_SAVE_DELAY = 0.5
+
+
+# Confidence a verified command needs before it is used without asking
+_TRUSTED_CONFIDENCE = 0.7
+
+# Timestamps are reused within this many seconds of each other
+_TIMESTAMP_RESOLUTION = 0.001
+
+_last_timestamp = (0.0, "")
+
+
+def _now_iso() -> str:
+    """Return the current local time as an ISO 8601 string.
+
+    Bursts of events (a learn followed by its log entries, say) share one
+    formatted timestamp instead of each formatting their own.
+    """
+    global _last_timestamp
+    tick = time.monotonic()
+    last_tick, last_iso = _last_timestamp
+    if tick - last_tick < _TIMESTAMP_RESOLUTION:
+        return last_iso
+    iso = datetime.now().isoformat()
+    _last_timestamp = (tick, iso)
+    return iso
+
+
+def _synchronized(method):
+    """Serialise calls to a RuleHawkMemory method with the instance lock."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 @dataclass
 class CommandEntry:
@@ -27,7 +91,18 @@ class CommandEntry:
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        data = asdict(self)
+        # Listed explicitly; asdict() deep-copies every field
+        data = {
+            "command": self.command,
+            "learned_at": self.learned_at,
+            "learned_from": self.learned_from,
+            "verified": self.verified,
+            "last_success": self.last_success,
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            "confidence": self.confidence,
+            "verification": self.verification,
+        }
         # Remove None values for cleaner JSON
         return {k: v for k, v in data.items() if v is not None}
 
@@ -50,24 +125,61 @@ class RuleHawkMemory:
 
         self.learned_data = self._load_learned()
 
+        # Serialized audit log lines waiting to be appended to log_file
+        self._log_buffer: List[str] = []
+        # Opened on the first write and kept open for the life of the instance
+        self._log_fd: Optional[IO[str]] = None
+
+        # Statistics updates mark the learned data dirty and are saved after
+        # a short quiet period (or at exit, unless close() ran first) rather
+        # than on every change
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._dirty_by = "unknown"
+        self._save_timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
+
     def _load_learned(self) -> dict:
         """Load learned commands from JSON file."""
-        if self.learned_file.exists():
-            try:
-                with open(self.learned_file) as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"Could not parse {self.learned_file}, starting fresh")
-                return self._create_empty_learned()
+        with self._file_lock(exclusive=False):
+            if self.learned_file.exists():
+                try:
+                    with open(self.learned_file) as f:
+                        return json.load(f)
+                except json.JSONDecodeError:
+                    logger.warning(f"Could not parse {self.learned_file}, starting fresh")
+                    return self._create_empty_learned()
         return self._create_empty_learned()
 
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Hold an advisory lock on the memory directory across processes.
+
+        The directory is locked rather than the learned file because saves
+        replace the file, and with it any lock held on the old one.
+
+        Args:
+            exclusive: Take an exclusive (write) lock rather than a shared one
+        """
+        if fcntl is None:
+            yield
+            return
+
+        fd = os.open(self.memory_dir, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
     def _create_empty_learned(self) -> dict:
         """Create empty learned commands structure."""
         return {
             "version": "1.0",
-            "project_id": str(uuid.uuid4()),
-            "created": datetime.now().isoformat(),
-            "last_updated": datetime.now().isoformat(),
+            "project_id": uuid.uuid4().hex,
+            "created": _now_iso(),
+            "last_updated": _now_iso(),
             "last_updated_by": "unknown",
             "detected": {},
             "commands": {},
@@ -75,32 +187,139 @@ class RuleHawkMemory:
             "environment": {},
         }
 
+    @_synchronized
     def save_learned(self, updated_by: str = "unknown"):
-        """Save learned commands to JSON file.
+        """Save learned commands to JSON file immediately.
 
         Args:
             updated_by: Identifier of who/what updated the commands
         """
-        self.learned_data["last_updated"] = datetime.now().isoformat()
+        self._dirty = False
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+        self.learned_data["last_updated"] = _now_iso()
         self.learned_data["last_updated_by"] = updated_by
 
-        with open(self.learned_file, "w") as f:
-            json.dump(self.learned_data, f, indent=2)
+        # Write to a temporary file and swap it in, so a crash mid-write
+        # never leaves a truncated learned file behind
+        tmp_file = self.learned_file.with_suffix(".json.tmp")
+        with self._file_lock(exclusive=True):
+            with open(tmp_file, "w") as f:
+                json.dump(self.learned_data, f, **_LEARNED_JSON_OPTIONS)
+            os.replace(tmp_file, self.learned_file)
+        self.flush_log()
 
         logger.info(f"Saved learned commands to {self.learned_file}")
 
+    def _mark_dirty(self, updated_by: str = "unknown"):
+        """Schedule a deferred save, restarting the quiet period.
+
+        Args:
+            updated_by: Identifier of who/what updated the commands
+        """
+        self._dirty = True
+        self._dirty_by = updated_by
+
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(_SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    @_synchronized
+    def flush(self):
+        """Save any deferred changes and write buffered log events."""
+        if self._dirty:
+            self.save_learned(self._dirty_by)
+        else:
+            self.flush_log()
+
+    @_synchronized
     def log_event(self, event: str, **kwargs):
         """Append an event to the JSONL audit log.
 
+        Events are buffered and written in batches, alongside each save of the
+        learned commands, and at interpreter exit; call flush_log() to force it.
+
         Args:
             event: Event type (e.g., "LEARN_CMD", "EXEC_CMD", "VERIFY_CMD")
             **kwargs: Additional event data
         """
-        entry = {"timestamp": datetime.now().isoformat(), "event": event, **kwargs}
+        entry = {"timestamp": _now_iso(), "event": event, **kwargs}
+
+        self._log_buffer.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        if len(self._log_buffer) >= _LOG_BATCH_SIZE:
+            self.flush_log()
+
+    @_synchronized
+    def flush_log(self):
+        """Write any buffered events to the JSONL audit log in one append."""
+        if not self._log_buffer:
+            return
+
+        lines, self._log_buffer = self._log_buffer, []
+        if self._log_fd is None:
+            self._log_fd = open(self.log_file, "a", buffering=1 << 16)
+        self._log_fd.write("".join(lines))
+        self._log_fd.flush()
+        self._maybe_rotate_log()
 
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+    def _maybe_rotate_log(self):
+        """Rotate the audit log once it grows past _LOG_MAX_BYTES.
 
+        Only one previous generation is kept, so the log (and its copy in
+        version control) stays bounded on long-running servers.
+        """
+        if os.fstat(self._log_fd.fileno()).st_size < _LOG_MAX_BYTES:
+            return
+
+        self._log_fd.close()
+        self._log_fd = None
+        os.replace(self.log_file, self.log_file.with_name(self.log_file.name + ".1"))
+
+    @_synchronized
+    def close(self):
+        """Flush pending changes and close the audit log.
+
+        Also drops the exit-time flush, which otherwise keeps the instance
+        alive until the interpreter exits.
+        """
+        self.flush()
+        if self._log_fd is not None:
+            self._log_fd.close()
+            self._log_fd = None
+        atexit.unregister(self.close)
+
+    def iter_log(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over audit log events, oldest first.
+
+        Buffered events are flushed first, and the rotated log is read before
+        the current one. Files are memory-mapped, so large logs are parsed
+        line by line without being read into memory. Lines that are not valid
+        JSON (such as one cut short by a crash) are skipped.
+
+        Yields:
+            One dictionary per logged event
+        """
+        self.flush_log()
+
+        rotated = self.log_file.with_name(self.log_file.name + ".1")
+        for path in (rotated, self.log_file):
+            if not path.exists() or path.stat().st_size == 0:
+                continue
+
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b""):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed line in {path}")
+
+    @_synchronized
     def get_command(self, cmd_type: str) -> Optional[str]:
         """Get a learned command if available and trusted.
 
@@ -110,20 +329,19 @@ class RuleHawkMemory:
         Returns:
             Command string if available and trusted, None otherwise
         """
-        if cmd_type in self.learned_data["commands"]:
-            cmd_data = self.learned_data["commands"][cmd_type]
-
-            # Only return verified commands with decent confidence
-            if cmd_data.get("verified") and cmd_data.get("confidence", 0) >= 0.7:
-                self.log_event(
-                    "USE_LEARNED_CMD",
-                    type=cmd_type,
-                    command=cmd_data["command"],
-                    confidence=cmd_data["confidence"],
-                )
-                return cmd_data["command"]
+        cmd_data = self.learned_data["commands"].get(cmd_type)
+        if cmd_data is None:
+            return None
+
+        # Only return verified commands with decent confidence
+        confidence = cmd_data.get("confidence", 0)
+        if cmd_data.get("verified") and confidence >= _TRUSTED_CONFIDENCE:
+            command = cmd_data["command"]
+            self.log_event("USE_LEARNED_CMD", type=cmd_type, command=command, confidence=confidence)
+            return command
         return None
 
+    @_synchronized
     def learn_command(self, cmd_type: str, command: str, source: str):
         """Learn a new command (unverified).
 
@@ -134,7 +352,7 @@ class RuleHawkMemory:
         """
         self.learned_data["commands"][cmd_type] = {
             "command": command,
-            "learned_at": datetime.now().isoformat(),
+            "learned_at": _now_iso(),
             "learned_from": source,
             "verified": False,
             "success_count": 0,
@@ -146,6 +364,55 @@ class RuleHawkMemory:
         self.save_learned(source)
         self.log_event("LEARN_CMD", type=cmd_type, command=command, source=source, verified=False)
 
+    @_synchronized
+    def learn_and_verify(
+        self,
+        cmd_type: str,
+        command: str,
+        source: str,
+        verification_method: str,
+        verification_details: Optional[Dict[str, Any]] = None,
+    ):
+        """Learn a command that has already been verified, writing to disk once.
+
+        Equivalent to learn_command() followed by mark_command_verified(), but
+        the learned commands file is only saved a single time.
+
+        Args:
+            cmd_type: Type of command (e.g., "TEST_CMD", "LINT_CMD")
+            command: The command string to learn
+            source: Who/what provided the command
+            verification_method: How it was verified (e.g., "exit_code", "agent_provided")
+            verification_details: Additional verification information
+        """
+        now = _now_iso()
+        self.learned_data["commands"][cmd_type] = {
+            "command": command,
+            "learned_at": now,
+            "learned_from": source,
+            "verified": True,
+            "success_count": 0,
+            "failure_count": 0,
+            # Verified commands start at the trusted threshold
+            "confidence": 0.7,
+            "verification": {
+                "method": verification_method,
+                "verified_at": now,
+                **(verification_details or {}),
+            },
+        }
+
+        self.save_learned(source)
+        self.log_event("LEARN_CMD", type=cmd_type, command=command, source=source, verified=False)
+        self.log_event(
+            "VERIFY_CMD",
+            type=cmd_type,
+            command=command,
+            method=verification_method,
+            result="verified",
+        )
+
+    @_synchronized
     def update_command_result(
         self,
         cmd_type: str,
@@ -161,24 +428,24 @@ class RuleHawkMemory:
             duration_ms: Execution duration in milliseconds
             output_sample: Sample of command output
         """
-        if cmd_type not in self.learned_data["commands"]:
+        cmd_data = self.learned_data["commands"].get(cmd_type)
+        if cmd_data is None:
             return
 
-        cmd_data = self.learned_data["commands"][cmd_type]
-
+        now = _now_iso()
         if success:
             cmd_data["success_count"] += 1
-            cmd_data["last_success"] = datetime.now().isoformat()
+            cmd_data["last_success"] = now
             if duration_ms:
                 cmd_data.setdefault("typical_duration_ms", duration_ms)
         else:
             cmd_data["failure_count"] += 1
-            cmd_data["last_failure"] = datetime.now().isoformat()
+            cmd_data["last_failure"] = now
 
         # Update confidence based on success/failure ratio
         cmd_data["confidence"] = self._calculate_confidence(cmd_data)
 
-        self.save_learned()
+        self._mark_dirty()
         self.log_event(
             "EXEC_CMD",
             type=cmd_type,
@@ -214,6 +481,7 @@ class RuleHawkMemory:
         # Cap at 0.98 - never fully trust
         return min(empirical, 0.98)
 
+    @_synchronized
     def mark_command_verified(
         self,
         cmd_type: str,
@@ -227,20 +495,20 @@ class RuleHawkMemory:
             verification_method: How it was verified (e.g., "exit_code", "output_analysis")
             verification_details: Additional verification information
         """
-        if cmd_type not in self.learned_data["commands"]:
+        cmd_data = self.learned_data["commands"].get(cmd_type)
+        if cmd_data is None:
             return
-
-        cmd_data = self.learned_data["commands"][cmd_type]
         cmd_data["verified"] = True
         cmd_data["verification"] = {
             "method": verification_method,
-            "verified_at": datetime.now().isoformat(),
+            "verified_at": _now_iso(),
             **(verification_details or {}),
         }
 
         # Boost confidence for verified commands
         cmd_data["confidence"] = max(cmd_data["confidence"], 0.7)
 
+        # Verification changes what is trusted, so it is saved at once
         self.save_learned()
         self.log_event(
             "VERIFY_CMD",
@@ -250,6 +518,7 @@ class RuleHawkMemory:
             result="verified",
         )
 
+    @_synchronized
     def reject_command(self, command: str, suggested_by: str, reason: str):
         """Record a rejected command that didn't work or was dangerous.
 
@@ -261,31 +530,48 @@ class RuleHawkMemory:
         rejection = {
             "command": command,
             "suggested_by": suggested_by,
-            "rejected_at": datetime.now().isoformat(),
+            "rejected_at": _now_iso(),
             "reason": reason,
         }
 
-        self.learned_data.setdefault("rejected_commands", []).append(rejection)
+        rejected = self.learned_data.setdefault("rejected_commands", [])
+        rejected.append(rejection)
 
         # Keep only last 50 rejections
-        if len(self.learned_data["rejected_commands"]) > 50:
-            self.learned_data["rejected_commands"] = self.learned_data["rejected_commands"][-50:]
+        if len(rejected) > 50:
+            del rejected[:-50]
 
-        self.save_learned()
+        # Saved at once, so a crash can't forget that the command was refused
+        self.save_learned(suggested_by)
         self.log_event("REJECT_CMD", command=command, source=suggested_by, reason=reason)
 
+    @_synchronized
     def get_all_commands(self) -> Dict[str, str]:
         """Get all learned commands that are verified.
 
         Returns:
             Dictionary of command_type -> command string
         """
-        result = {}
-        for cmd_type, cmd_data in self.learned_data.get("commands", {}).items():
-            if cmd_data.get("verified") and cmd_data.get("confidence", 0) > 0.5:
-                result[cmd_type] = cmd_data["command"]
-        return result
+        return {
+            cmd_type: cmd_data["command"]
+            for cmd_type, cmd_data in self.learned_data.get("commands", {}).items()
+            if cmd_data.get("verified") and cmd_data.get("confidence", 0) > 0.5
+        }
+
+    @_synchronized
+    def get_trusted_commands(self) -> Dict[str, Tuple[str, float]]:
+        """Get the learned commands get_command would return, without logging their use.
+
+        Returns:
+            Dictionary of command_type -> (command string, confidence)
+        """
+        return {
+            cmd_type: (cmd_data["command"], cmd_data.get("confidence", 0))
+            for cmd_type, cmd_data in self.learned_data.get("commands", {}).items()
+            if cmd_data.get("verified") and cmd_data.get("confidence", 0) >= _TRUSTED_CONFIDENCE
+        }
 
+    @_synchronized
     def set_project_info(
         self,
         language: str = None,
@@ -312,7 +598,7 @@ class RuleHawkMemory:
         if test_framework:
             detected["test_framework"] = test_framework
 
-        self.save_learned()
+        self._mark_dirty()
 
     def get_project_info(self) -> dict:
         """Get detected project information.
@@ -322,13 +608,21 @@ class RuleHawkMemory:
         """
         return self.learned_data.get("detected", {})
 
-    def clear_command(self, cmd_type: str):
+    @_synchronized
+    def clear_command(self, cmd_type: str, on_cleared: Optional[Callable[[str], None]] = None):
         """Clear a learned command (for re-learning).
 
         Args:
             cmd_type: Type of command to clear
+            on_cleared: Called with the tool the cleared command ran, e.g. to
+                drop cached checks of that tool before re-learning
         """
-        if cmd_type in self.learned_data["commands"]:
-            del self.learned_data["commands"][cmd_type]
+        cmd_data = self.learned_data["commands"].pop(cmd_type, None)
+        if cmd_data is not None:
+            # Saved at once, so a crash can't bring back a cleared command
             self.save_learned()
             self.log_event("CLEAR_CMD", type=cmd_type)
+
+            parts = cmd_data["command"].split()
+            if on_cleared is not None and parts:
+                on_cleared(parts[0])
@@ -2,12 +2,167 @@
 Enhanced Rule Runner with detailed failure reasons and skip functionality
 """
 
+import functools
+import io
+import itertools
+import os
 import re
+import shlex
+import signal
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+# file:line:column: message, as printed by most linters and compilers. The
+# file name is matched lazily so the first line:column pair wins.
+_FILE_LINE_RE = re.compile(r"^(.+?):(\d+):(\d+):\s*(.+)$")
+
+# Characters that need /bin/sh to interpret: operators, redirects,
+# substitutions and globs
+_SHELL_CHARS = frozenset("|&;<>()$`*?[~\n")
+
+# One rulehawkignore entry: RULE_ID:reason or RULE_ID:until=YYYY-MM-DD[:reason]
+_IGNORE_LINE_RE = re.compile(
+    r"(?P<rule_id>[^:]*):(?:until=(?P<until>[^:]*)(?::(?P<until_reason>.*))?|(?P<reason>.*))",
+    re.DOTALL,
+)
+
+# A zero-padded YYYY-MM-DD date, the common form of an until= date
+_ISO_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# Bytes of each output stream kept from a check command; the rest is drained
+# and discarded so chatty linters can't balloon memory
+_OUTPUT_LIMIT = 64 * 1024
+
+# Seconds to wait for output readers once a command has been killed; a child
+# that left the command's process group can hold its pipes open indefinitely
+_READER_GRACE = 1.0
+
+# Summary counter for a (status, severity) result; a None severity matches any
+# severity not listed. Other statuses (unknown, error) aren't counted.
+_COUNT_KEYS = {
+    ("passed", None): "passed_count",
+    ("skipped", None): "skipped_count",
+    ("failed", None): "failed_count",
+    ("failed", "warning"): "warning_count",
+    ("failed", "info"): "warning_count",
+}
+
+# Most rule check commands run at once
+_MAX_PARALLEL_CHECKS = 8
+
+# Lines reporting a failure; unanchored so "AssertionError:" also matches
+_ERROR_LINE_RE = re.compile(r"(?:error|failed):", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=128)
+def _command_argv(command: str) -> Optional[Tuple[str, ...]]:
+    """Split a command for direct execution, or None if it needs a shell"""
+    # Windows tools are often .cmd shims (npm, eslint) that only cmd.exe runs
+    if os.name == "nt" or _SHELL_CHARS.intersection(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    # Leading VAR=value assignments are also shell syntax
+    if not argv or "=" in argv[0]:
+        return None
+    return tuple(argv)
+
+
+def _drain(stream: IO[bytes], limit: int, chunks: List[bytes]):
+    """Read a pipe to EOF, keeping at most limit bytes of it in chunks"""
+    kept = 0
+    for chunk in iter(lambda: stream.read(8192), b""):
+        if kept < limit:
+            chunks.append(chunk[: limit - kept])
+            kept += len(chunks[-1])
+    stream.close()
+
+
+# Commands _run_capped has started and not yet reaped. Each runs in a session
+# of its own, out of reach of a terminal Ctrl-C, so an interrupted caller
+# kills them through _kill_running_commands
+_running_commands: Set[subprocess.Popen] = set()
+_running_lock = threading.Lock()
+
+
+def _kill_process_group(process: subprocess.Popen):
+    """Kill a command along with any children it left running in its process group"""
+    if os.name == "nt":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _kill_running_commands():
+    """Kill every command _run_capped is running, e.g. when the caller is interrupted"""
+    with _running_lock:
+        running = list(_running_commands)
+    for process in running:
+        _kill_process_group(process)
+
+
+def _run_capped(
+    args: Union[str, Sequence[str]], shell: bool, timeout: float, cwd: Path
+) -> subprocess.CompletedProcess:
+    """Run a command capturing its output, keeping _OUTPUT_LIMIT bytes per stream
+
+    Raises:
+        subprocess.TimeoutExpired: If the command, or a child it left in the
+            background holding its output open, runs longer than timeout
+    """
+    deadline = time.monotonic() + timeout
+    # A session of its own puts backgrounded children in the command's
+    # process group, so a timeout kills them too
+    process = subprocess.Popen(
+        args,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        start_new_session=os.name != "nt",
+    )
+    with _running_lock:
+        _running_commands.add(process)
+    outputs: Tuple[List[bytes], List[bytes]] = ([], [])
+    readers = [
+        threading.Thread(target=_drain, args=(stream, _OUTPUT_LIMIT, chunks), daemon=True)
+        for stream, chunks in zip((process.stdout, process.stderr), outputs)
+    ]
+    for reader in readers:
+        reader.start()
+
+    try:
+        process.wait(timeout=timeout)
+        # Output isn't complete until background children close the pipes too
+        for reader in readers:
+            reader.join(max(0.0, deadline - time.monotonic()))
+        if any(reader.is_alive() for reader in readers):
+            raise subprocess.TimeoutExpired(args, timeout)
+    except BaseException:
+        # Timed out, or interrupted (a Ctrl-C doesn't reach the command's session)
+        _kill_process_group(process)
+        process.wait()
+        raise
+    finally:
+        with _running_lock:
+            _running_commands.discard(process)
+        for reader in readers:
+            reader.join(_READER_GRACE)
+
+    stdout, stderr = (b"".join(chunks).decode("utf-8", errors="replace") for chunks in outputs)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
 
 
 @dataclass
@@ -25,60 +180,116 @@ class RuleException:
         return date.today() <= self.until_date
 
 
+def _parse_until_date(value: str) -> date:
+    """Parse an until=YYYY-MM-DD date, also accepting unpadded months and days"""
+    # fromisoformat only takes the padded form here: from 3.11 it also
+    # accepts 20990101 and week dates, which strptime rejects
+    if _ISO_DATE_RE.fullmatch(value):
+        return date.fromisoformat(value)
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_ignore_file(path: str, mtime_ns: int, size: int) -> Dict[str, RuleException]:
+    """Parse a rulehawkignore file; mtime_ns and size key the cache entry"""
+    exceptions = {}
+
+    try:
+        text = Path(path).read_text(encoding="utf-8", errors="replace")
+        for line_num, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+
+            # Skip comments and empty lines
+            if not line or line.startswith("#"):
+                continue
+
+            # Parse exception format
+            # Format: RULE_ID:reason or RULE_ID:until=YYYY-MM-DD:reason
+            match = _IGNORE_LINE_RE.fullmatch(line)
+            if not match:
+                print(f"Warning: Invalid exception format at line {line_num}: {line}")
+                continue
+
+            # Interned to share the registry's id strings, so lookups by
+            # rule id compare by identity
+            rule_id = sys.intern(match["rule_id"].strip())
+
+            # Check for until date
+            if match["until"] is not None:
+                try:
+                    until_date = _parse_until_date(match["until"])
+                except ValueError as e:
+                    print(f"Warning: Invalid date at line {line_num}: {e}")
+                    continue
+                reason = match["until_reason"]
+                if reason is None:
+                    reason = "Temporarily disabled"
+            else:
+                until_date = None
+                reason = match["reason"]
+
+            exceptions[rule_id] = RuleException(rule_id, reason, until_date)
+
+    except Exception as e:
+        print(f"Warning: Could not load rulehawkignore: {e}")
+
+    return exceptions
+
+
+# Files whose presence marks a Python project
+_PYTHON_MARKERS = frozenset({"requirements.txt", "pyproject.toml", "setup.py"})
+
+
+@functools.lru_cache(maxsize=16)
+def _detect_language(project_root: str) -> str:
+    """Detect the primary language of a project, memoised per root directory"""
+    # One directory listing instead of a stat() per marker file
+    try:
+        with os.scandir(project_root) as entries:
+            names = {entry.name for entry in entries}
+    except OSError:
+        return "unknown"
+
+    if "package.json" in names:
+        if "tsconfig.json" in names:
+            return "typescript"
+        return "javascript"
+    elif names.intersection(_PYTHON_MARKERS):
+        return "python"
+    return "unknown"
+
+
 class RuleExceptionManager:
     """Manages rule exceptions from rulehawkignore file"""
 
     def __init__(self, ignore_file: Path = Path("rulehawkignore")):
         self.ignore_file = ignore_file
         self.exceptions = self._load_exceptions()
+        # Rules skipped indefinitely, which need no date check
+        self._permanent = frozenset(
+            rule_id
+            for rule_id, exception in self.exceptions.items()
+            if exception.until_date is None
+        )
 
     def _load_exceptions(self) -> Dict[str, RuleException]:
         """Load exceptions from rulehawkignore file"""
-        exceptions = {}
-
-        if not self.ignore_file.exists():
-            return exceptions
-
         try:
-            with open(self.ignore_file) as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-
-                    # Skip comments and empty lines
-                    if not line or line.startswith("#"):
-                        continue
-
-                    # Parse exception format
-                    # Format: RULE_ID:reason or RULE_ID:until=YYYY-MM-DD:reason
-                    parts = line.split(":", 2)
-                    if len(parts) < 2:
-                        print(f"Warning: Invalid exception format at line {line_num}: {line}")
-                        continue
-
-                    rule_id = parts[0].strip()
-
-                    # Check for until date
-                    if parts[1].startswith("until="):
-                        try:
-                            date_str = parts[1].replace("until=", "")
-                            until_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                            reason = parts[2] if len(parts) > 2 else "Temporarily disabled"
-                        except ValueError as e:
-                            print(f"Warning: Invalid date at line {line_num}: {e}")
-                            continue
-                    else:
-                        until_date = None
-                        reason = ":".join(parts[1:])
+            stat = self.ignore_file.stat()
+        except OSError:
+            return {}
 
-                    exceptions[rule_id] = RuleException(rule_id, reason, until_date)
-
-        except Exception as e:
-            print(f"Warning: Could not load rulehawkignore: {e}")
-
-        return exceptions
+        # Re-parsed only when the file changes
+        return dict(
+            _parse_ignore_file(str(self.ignore_file.resolve()), stat.st_mtime_ns, stat.st_size)
+        )
 
     def should_skip(self, rule_id: str) -> Tuple[bool, Optional[str]]:
         """Check if a rule should be skipped"""
+        if not self.exceptions:
+            return False, None
+        if rule_id in self._permanent:
+            return True, self.exceptions[rule_id].reason
         if rule_id in self.exceptions:
             exception = self.exceptions[rule_id]
             if exception.is_active():
@@ -92,6 +303,23 @@ class RuleExceptionManager:
 class EnhancedRuleResult:
     """Enhanced result with detailed failure information"""
 
+    # One result is built per rule checked; slots keep each one small
+    __slots__ = (
+        "rule_id",
+        "rule_name",
+        "severity",
+        "phase",
+        "description",
+        "status",
+        "message",
+        "details",
+        "fix_available",
+        "fix_command",
+        "skip_reason",
+        "command_output",
+        "error_details",
+    )
+
     def __init__(self, rule: Dict[str, Any]):
         self.rule_id = rule["id"]
         self.rule_name = rule["name"]
@@ -110,13 +338,23 @@ class EnhancedRuleResult:
 
     def to_dict(self, verbosity: str = "normal") -> Dict[str, Any]:
         """Convert to dictionary with specified verbosity"""
-        if verbosity == "minimal":
-            return {
-                "rule": self.rule_id,
-                "status": self.status,
-                "message": self.message[:100] if self.message else "",
-            }
+        return self.serializer(verbosity)(self)
+
+    @classmethod
+    def serializer(cls, verbosity: str) -> Callable[["EnhancedRuleResult"], Dict[str, Any]]:
+        """Get the to_dict implementation for a verbosity, to reuse across results"""
+        return cls._SERIALIZERS.get(verbosity, cls._to_dict_base)
+
+    def _to_dict_minimal(self) -> Dict[str, Any]:
+        """Rule, status and a truncated message"""
+        return {
+            "rule": self.rule_id,
+            "status": self.status,
+            "message": self.message[:100] if self.message else "",
+        }
 
+    def _to_dict_base(self) -> Dict[str, Any]:
+        """Fields shared by the normal and verbose forms"""
         result = {
             "rule": self.rule_id,
             "name": self.rule_name,
@@ -128,33 +366,48 @@ class EnhancedRuleResult:
         if self.skip_reason:
             result["skip_reason"] = self.skip_reason
 
-        if verbosity == "verbose":
-            result["phase"] = self.phase
-            result["description"] = self.description
+        return result
+
+    def _to_dict_normal(self) -> Dict[str, Any]:
+        """Base fields plus the first few details"""
+        result = self._to_dict_base()
+
+        if self.details:
+            result["details"] = self.details[:3]  # First 3 details
 
-            if self.details:
-                result["details"] = self.details
+        if self.fix_available:
+            result["fixable"] = True
 
-            if self.fix_available:
-                result["fix_available"] = True
-                if self.fix_command:
-                    result["fix_command"] = self.fix_command
+        return result
+
+    def _to_dict_verbose(self) -> Dict[str, Any]:
+        """Everything known about the result"""
+        result = self._to_dict_base()
+        result["phase"] = self.phase
+        result["description"] = self.description
 
-            if self.command_output:
-                result["command_output"] = self.command_output
+        if self.details:
+            result["details"] = self.details
 
-            if self.error_details:
-                result["error_details"] = self.error_details
+        if self.fix_available:
+            result["fix_available"] = True
+            if self.fix_command:
+                result["fix_command"] = self.fix_command
 
-        elif verbosity == "normal":
-            if self.details:
-                result["details"] = self.details[:3]  # First 3 details
+        if self.command_output:
+            result["command_output"] = self.command_output
 
-            if self.fix_available:
-                result["fixable"] = True
+        if self.error_details:
+            result["error_details"] = self.error_details
 
         return result
 
+    _SERIALIZERS = {
+        "minimal": _to_dict_minimal,
+        "normal": _to_dict_normal,
+        "verbose": _to_dict_verbose,
+    }
+
 
 class EnhancedRuleRunner:
     """Enhanced rule runner with better error reporting and skip functionality"""
@@ -165,20 +418,16 @@ class EnhancedRuleRunner:
         self.exception_manager = RuleExceptionManager()
         self.project_root = Path.cwd()
         self.language = self._detect_language()
+        # Rule id -> (check command, has fix, fix command) for self.language
+        self._resolved: Dict[str, Tuple[Optional[str], bool, Optional[str]]] = {}
+        # Check command -> its run, shared by rules with the same command;
+        # only set while check_rules is running
+        self._command_runs: Optional[Dict[str, Future]] = None
+        self._runs_lock = threading.Lock()
 
     def _detect_language(self) -> str:
         """Detect the primary language of the project"""
-        if (self.project_root / "package.json").exists():
-            if (self.project_root / "tsconfig.json").exists():
-                return "typescript"
-            return "javascript"
-        elif (
-            (self.project_root / "requirements.txt").exists()
-            or (self.project_root / "pyproject.toml").exists()
-            or (self.project_root / "setup.py").exists()
-        ):
-            return "python"
-        return "unknown"
+        return _detect_language(str(self.project_root))
 
     def check_rules(self, rules: List[Dict[str, Any]], auto_fix: bool = False) -> Dict[str, Any]:
         """Check multiple rules with enhanced reporting"""
@@ -193,53 +442,92 @@ class EnhancedRuleRunner:
             "details": [],
         }
 
-        for rule in rules:
-            result = self._check_single_rule(rule, auto_fix)
-            results["details"].append(result.to_dict(self.verbosity))
-
-            if result.status == "passed":
-                results["passed_count"] += 1
-            elif result.status == "skipped":
-                results["skipped_count"] += 1
-            elif result.status == "failed":
-                if result.severity in ("warning", "info"):
-                    results["warning_count"] += 1
-                else:
-                    results["failed_count"] += 1
+        self._resolved = {rule["id"]: self._language_commands(rule) for rule in rules}
+
+        # Skipped rules are resolved up front; the rest run their check
+        # commands in parallel, since each mostly waits on a subprocess
+        checked: List[Optional[EnhancedRuleResult]] = [self._skip_result(rule) for rule in rules]
+        pending = [index for index, result in enumerate(checked) if result is None]
+        if pending:
+            workers = min(_MAX_PARALLEL_CHECKS, len(pending))
+            self._command_runs = {}
+            executor = ThreadPoolExecutor(max_workers=workers)
+            try:
+                futures = [
+                    executor.submit(self._check_single_rule, rules[index], auto_fix)
+                    for index in pending
+                ]
+                try:
+                    for index, future in zip(pending, futures):
+                        checked[index] = future.result()
+                except BaseException:
+                    # Interrupted: drop the queued checks and kill the running
+                    # ones rather than wait for every command to finish
+                    for future in futures:
+                        future.cancel()
+                    _kill_running_commands()
+                    raise
+            finally:
+                executor.shutdown(wait=False)
+                self._command_runs = None
+
+        serialize = EnhancedRuleResult.serializer(self.verbosity)
+        for result in checked:
+            results["details"].append(serialize(result))
+
+            default_key = _COUNT_KEYS.get((result.status, None))
+            count_key = _COUNT_KEYS.get((result.status, result.severity), default_key)
+            if count_key:
+                results[count_key] += 1
 
         return results
 
-    def _check_single_rule(self, rule: Dict[str, Any], auto_fix: bool) -> EnhancedRuleResult:
-        """Check a single rule with enhanced error reporting"""
-        result = EnhancedRuleResult(rule)
+    def _language_commands(self, rule: Dict[str, Any]) -> Tuple[Optional[str], bool, Optional[str]]:
+        """Pick a rule's check and fix commands for the detected language"""
+        check_command = rule.get("check_command")
+        if isinstance(check_command, dict):
+            check_command = check_command.get(self.language)
+        elif not isinstance(check_command, str):
+            check_command = None
+
+        fix_command = rule.get("fix_command")
+        has_fix = bool(fix_command)
+        if isinstance(fix_command, dict):
+            fix_command = fix_command.get(self.language)
+
+        return check_command, has_fix, fix_command
 
-        # Check if rule should be skipped
+    def _skip_result(self, rule: Dict[str, Any]) -> Optional[EnhancedRuleResult]:
+        """Build the result for a rule excluded in rulehawkignore, if it is"""
         should_skip, skip_reason = self.exception_manager.should_skip(rule["id"])
-        if should_skip:
-            result.status = "skipped"
-            result.message = f"Skipped: {skip_reason}"
-            result.skip_reason = skip_reason
-            return result
+        if not should_skip:
+            return None
 
+        result = EnhancedRuleResult(rule)
+        result.status = "skipped"
+        result.message = f"Skipped: {skip_reason}"
+        result.skip_reason = skip_reason
+        return result
+
+    def _check_single_rule(self, rule: Dict[str, Any], auto_fix: bool) -> EnhancedRuleResult:
+        """Check a single rule with enhanced error reporting"""
+        skipped = self._skip_result(rule)
+        if skipped:
+            return skipped
+
+        result = EnhancedRuleResult(rule)
         try:
-            # Check for language-specific command
-            check_command = None
-            if isinstance(rule.get("check_command"), dict):
-                check_command = rule["check_command"].get(self.language)
-            elif isinstance(rule.get("check_command"), str):
-                check_command = rule["check_command"]
+            # Language-specific commands, normally resolved by check_rules
+            commands = self._resolved.get(rule["id"])
+            if commands is None:
+                commands = self._language_commands(rule)
+            check_command, has_fix, fix_command = commands
 
             if check_command:
-                # Run the check command
+                # Run the check command (argv names a missing tool below)
+                argv = _command_argv(check_command)
                 try:
-                    proc_result = subprocess.run(
-                        check_command,
-                        shell=True,
-                        capture_output=True,
-                        text=True,
-                        timeout=30,
-                        cwd=self.project_root,
-                    )
+                    proc_result = self._run_check_command(check_command)
 
                     result.command_output = {
                         "stdout": proc_result.stdout[:500] if self.verbosity == "verbose" else None,
@@ -260,13 +548,15 @@ class EnhancedRuleRunner:
                         )
 
                         # Check if fix is available
-                        if rule.get("fix_command"):
+                        if has_fix:
                             result.fix_available = True
-                            fix_cmd = rule["fix_command"]
-                            if isinstance(fix_cmd, dict):
-                                result.fix_command = fix_cmd.get(self.language)
-                            else:
-                                result.fix_command = fix_cmd
+                            result.fix_command = fix_command
+
+                except FileNotFoundError:
+                    missing = argv[0] if argv else check_command
+                    result.status = "failed"
+                    result.message = f"Command not found: {missing}"
+                    result.error_details = f"Install {missing} or check PATH"
 
                 except subprocess.TimeoutExpired:
                     result.status = "failed"
@@ -289,24 +579,50 @@ class EnhancedRuleRunner:
 
         return result
 
+    def _run_check_command(self, check_command: str) -> subprocess.CompletedProcess:
+        """Run a check command once per check_rules call, however many rules use it"""
+        runs = self._command_runs
+        if runs is None:
+            return self._execute(check_command)
+
+        with self._runs_lock:
+            run = runs.get(check_command)
+            owner = run is None
+            if owner:
+                run = runs[check_command] = Future()
+
+        if owner:
+            try:
+                run.set_result(self._execute(check_command))
+            except Exception as e:
+                run.set_exception(e)
+        return run.result()
+
+    def _execute(self, check_command: str) -> subprocess.CompletedProcess:
+        """Run a check command, without a shell unless it needs one"""
+        argv = _command_argv(check_command)
+        return _run_capped(
+            argv if argv is not None else check_command,
+            shell=argv is None,
+            timeout=30,
+            cwd=self.project_root,
+        )
+
     def _extract_error_message(self, output: str) -> str:
         """Extract meaningful error message from command output"""
         if not output:
             return "Check failed with no output"
 
-        lines = output.strip().split("\n")
-
-        # Look for common error patterns
-        for line in lines:
-            if "error:" in line.lower() or "failed:" in line.lower():
+        # Look for common error patterns, remembering the first non-empty
+        # line as a fallback
+        first_line = None
+        for line in io.StringIO(output.strip()):
+            if _ERROR_LINE_RE.search(line):
                 return line.strip()
+            if first_line is None and line.strip():
+                first_line = line.strip()
 
-        # Return first non-empty line
-        for line in lines:
-            if line.strip():
-                return line.strip()
-
-        return "Check failed"
+        return first_line or "Check failed"
 
     def _extract_error_details(self, output: str) -> List[str]:
         """Extract detailed error information"""
@@ -314,13 +630,12 @@ class EnhancedRuleRunner:
             return []
 
         details = []
-        lines = output.strip().split("\n")
+        lines = io.StringIO(output.strip())
 
         # Look for file:line:column patterns (common in linters)
-        file_pattern = re.compile(r"^(.+):(\d+):(\d+):\s*(.+)$")
-
-        for line in lines[:10]:  # Limit to first 10 lines
-            match = file_pattern.match(line)
+        for line in itertools.islice(lines, 10):  # Limit to first 10 lines
+            line = line.rstrip("\n")
+            match = _FILE_LINE_RE.match(line)
             if match:
                 details.append(f"{match.group(1)}:{match.group(2)} - {match.group(4)}")
             elif line.strip() and not line.startswith(" "):
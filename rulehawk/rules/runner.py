@@ -2,13 +2,18 @@
 Rule Runner - Executes rule checks and fixes
 """
 
+import functools
 import json
+import os
 import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from ..integrations.ai_bridge import AIBridge
+from .enhanced_runner import _command_argv, _kill_running_commands, _run_capped
 from .validators import (
     check_branch_protection,
     check_ci_status,
@@ -18,6 +23,33 @@ from .validators import (
     run_security_phase,
 )
 
+# Most rule checks run at once
+_MAX_PARALLEL_CHECKS = 8
+
+# File suffixes handed to AI checks
+_SOURCE_SUFFIXES = frozenset({".py", ".js", ".ts", ".jsx", ".tsx"})
+
+# Dependency, cache and build output directories never searched for source files
+_SKIPPED_DIRS = frozenset({"node_modules", ".git", "__pycache__", ".venv", "dist", "build"})
+
+
+def _walk_source_files(root: str, rel_dir: str) -> Iterator[str]:
+    """Yield source files under root/rel_dir as root-relative paths, in rglob order"""
+    subdirs = []
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _SKIPPED_DIRS:
+                        subdirs.append(entry.name)
+                elif entry.is_file() and os.path.splitext(entry.name)[1] in _SOURCE_SUFFIXES:
+                    yield os.path.join(rel_dir, entry.name)
+    except OSError:
+        return
+
+    for name in subdirs:
+        yield from _walk_source_files(root, os.path.join(rel_dir, name))
+
 
 class RuleRunner:
     """Executes rule checks against the codebase"""
@@ -28,8 +60,29 @@ class RuleRunner:
         self.ai_bridge = AIBridge(ai_provider)
         self.project_root = Path.cwd()
         self.language = self._detect_language()
+        # git diff / source scan for AI checks, shared by every rule in a run
+        self._relevant_files: Optional[List[str]] = None
+        self._relevant_files_lock = threading.Lock()
+        # (check command, timeout) -> its run, shared by rules with the same
+        # command; only set while check_rules runs checks in parallel
+        self._command_runs: Optional[Dict[Tuple[str, float], Future]] = None
+        self._runs_lock = threading.Lock()
+        # Config-derived validator settings are bound once, not read per check
+        # (protected_branches may sit in rulehawk.yaml's config section or at the root)
+        protected_branches = config.get("config", {}).get(
+            "protected_branches", config.get("protected_branches")
+        )
+        if isinstance(protected_branches, str):
+            # A lone branch name, not a set of one-letter branches
+            protected_branches = [protected_branches]
+        elif protected_branches is not None and not isinstance(protected_branches, list):
+            raise ValueError("protected_branches must be a list of branch names")
         self.validators = {
-            "check_branch_protection": check_branch_protection,
+            "check_branch_protection": (
+                functools.partial(check_branch_protection, protected=frozenset(protected_branches))
+                if protected_branches is not None
+                else check_branch_protection
+            ),
             "check_environment": check_environment,
             "check_task_plan": check_task_plan,
             "check_task_plan_updated": check_task_plan_updated,
@@ -39,20 +92,23 @@ class RuleRunner:
 
     def _detect_language(self) -> str:
         """Detect the primary language of the project"""
-        if (self.project_root / "package.json").exists():
+        # One directory listing instead of a stat() per marker file
+        try:
+            with os.scandir(self.project_root) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            return "unknown"
+
+        if "package.json" in names:
             # Check for TypeScript
-            if (self.project_root / "tsconfig.json").exists():
+            if "tsconfig.json" in names:
                 return "typescript"
             return "javascript"
-        elif (
-            (self.project_root / "requirements.txt").exists()
-            or (self.project_root / "pyproject.toml").exists()
-            or (self.project_root / "setup.py").exists()
-        ):
+        elif names.intersection(("requirements.txt", "pyproject.toml", "setup.py")):
             return "python"
-        elif (self.project_root / "Cargo.toml").exists():
+        elif "Cargo.toml" in names:
             return "rust"
-        elif (self.project_root / "go.mod").exists():
+        elif "go.mod" in names:
             return "go"
         return "unknown"
 
@@ -67,8 +123,32 @@ class RuleRunner:
             "details": [],
         }
 
-        for rule in rules:
-            result = self._check_single_rule(rule, auto_fix)
+        # Checks mostly wait on subprocesses, so overlap them; fix commands
+        # rewrite files other checks read, so auto-fix runs go one at a time
+        workers = 1 if auto_fix else min(_MAX_PARALLEL_CHECKS, len(rules))
+        if workers > 1:
+            self._command_runs = {}
+            executor = ThreadPoolExecutor(max_workers=workers)
+            try:
+                futures = [
+                    executor.submit(self._check_single_rule, rule, auto_fix) for rule in rules
+                ]
+                try:
+                    checked = [future.result() for future in futures]
+                except BaseException:
+                    # Interrupted: drop the queued checks and kill the running
+                    # ones rather than wait for every command to finish
+                    for future in futures:
+                        future.cancel()
+                    _kill_running_commands()
+                    raise
+            finally:
+                executor.shutdown(wait=False)
+                self._command_runs = None
+        else:
+            checked = [self._check_single_rule(rule, auto_fix) for rule in rules]
+
+        for rule, result in zip(rules, checked):
             results["details"].append(result)
 
             if result["status"] == "passed":
@@ -80,7 +160,7 @@ class RuleRunner:
                     results["failed_count"] += 1
 
         # Log results
-        self._log_results(results)
+        self._log_results(results, rules)
 
         return results
 
@@ -109,7 +189,8 @@ class RuleRunner:
             if rule.get("check_command"):
                 command = self._get_command_for_language(rule["check_command"])
                 if command:
-                    success, output = self._run_command(command)
+                    timeout = rule.get("timeout_sec", 30)
+                    success, output = self._run_check_command(command, timeout)
                     result["status"] = "passed" if success else "failed"
                     result["message"] = output[:200] if output else "Check completed"
 
@@ -117,7 +198,7 @@ class RuleRunner:
                     if auto_fix and not success and rule.get("fix_command"):
                         fix_command = self._get_command_for_language(rule["fix_command"])
                         if fix_command:
-                            fix_success, fix_output = self._run_command(fix_command)
+                            fix_success, fix_output = self._run_command(fix_command, timeout)
                             if fix_success:
                                 result["status"] = "fixed"
                                 result["message"] = "Auto-fixed successfully"
@@ -158,22 +239,43 @@ class RuleRunner:
             return command_spec.get(self.language)
         return None
 
-    def _run_command(self, command: str) -> tuple[bool, str]:
-        """Run a shell command and return success status and output"""
+    def _run_check_command(self, command: str, timeout: float) -> Tuple[bool, str]:
+        """Run a check command once per parallel check_rules call, however many rules use it"""
+        runs = self._command_runs
+        if runs is None:
+            return self._run_command(command, timeout)
+
+        key = (command, timeout)
+        with self._runs_lock:
+            run = runs.get(key)
+            owner = run is None
+            if owner:
+                run = runs[key] = Future()
+
+        if owner:
+            try:
+                run.set_result(self._run_command(command, timeout))
+            except Exception as e:
+                run.set_exception(e)
+        return run.result()
+
+    def _run_command(self, command: str, timeout: float = 30) -> tuple[bool, str]:
+        """Run a command, without a shell unless it needs one, and return success and output"""
+        argv = _command_argv(command)
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30,
+            result = _run_capped(
+                argv if argv is not None else command,
+                shell=argv is None,
+                timeout=timeout,
                 cwd=self.project_root,
             )
             success = result.returncode == 0
             output = result.stdout if success else result.stderr
             return success, output.strip()
         except subprocess.TimeoutExpired:
-            return False, "Command timed out after 30 seconds"
+            return False, f"Command timed out after {timeout} seconds"
+        except FileNotFoundError:
+            return False, f"Command not found: {argv[0] if argv else command}"
         except Exception as e:
             return False, f"Command failed: {str(e)}"
 
@@ -187,7 +289,14 @@ class RuleRunner:
         return result
 
     def _get_relevant_files(self) -> List[str]:
-        """Get list of relevant files for AI to check"""
+        """Get list of relevant files for AI to check, found once per runner"""
+        with self._relevant_files_lock:
+            if self._relevant_files is None:
+                self._relevant_files = self._find_relevant_files()
+            return self._relevant_files
+
+    def _find_relevant_files(self) -> List[str]:
+        """Find recently changed or common source files for AI to check"""
         # Get recently modified files
         try:
             result = subprocess.run(
@@ -199,57 +308,39 @@ class RuleRunner:
             pass
 
         # Default to checking common source directories
+        # (the walk is lazy, so it stops reading directories at the tenth file)
         source_dirs = ["src", "lib", "app", "components"]
         files = []
         for dir_name in source_dirs:
-            dir_path = self.project_root / dir_name
-            if dir_path.exists():
-                for file in dir_path.rglob("*"):
-                    if file.is_file() and file.suffix in [".py", ".js", ".ts", ".jsx", ".tsx"]:
-                        files.append(str(file.relative_to(self.project_root)))
-                        if len(files) >= 10:
-                            return files
+            for file in _walk_source_files(str(self.project_root), dir_name):
+                files.append(file)
+                if len(files) >= 10:
+                    return files
         return files
 
-    def _log_results(self, results: Dict[str, Any]):
+    def _log_results(self, results: Dict[str, Any], rules: List[Dict[str, Any]]):
         """Log results to audit file"""
         log_dir = Path(self.config.get("logging", {}).get("dir", "rulehawk_data"))
         log_dir.mkdir(exist_ok=True)
 
-        log_file = log_dir / "audit.jsonl"
-        with open(log_file, "a") as f:
-            # Write each rule result as a separate JSON line
-            for detail in results["details"]:
-                log_entry = {
-                    "timestamp": results["timestamp"],
-                    "rule": detail["rule_id"],
-                    "status": detail["status"],
-                    "message": detail["message"],
-                    "severity": self._get_rule_severity(detail["rule_id"]),
-                }
-                f.write(json.dumps(log_entry) + "\n")
-
-    def _get_rule_severity(self, rule_id: str) -> str:
-        """Get severity for a rule ID"""
-        # This would ideally come from the registry
-        severity_map = {
-            "A1": "warning",
-            "A2": "warning",
-            "A3": "error",
-            "S1": "error",
-            "S2": "error",
-            "S3": "error",
-            "S4": "error",
-            "S5": "warning",
-            "P1": "error",
-            "P2": "info",
-            "F1": "warning",
-            "F2": "info",
-            "F3": "warning",
-            "C1": "error",
-            "C2": "warning",
-            "C3": "error",
-            "C4": "warning",
-            "C5": "error",
-        }
-        return severity_map.get(rule_id, "info")
+        # One JSON line per rule result, appended in a single write
+        lines = []
+        for rule, detail in zip(rules, results["details"]):
+            log_entry = {
+                "timestamp": results["timestamp"],
+                "rule": detail["rule_id"],
+                "status": detail["status"],
+                "message": detail["message"],
+                "severity": rule.get("severity", "info"),
+            }
+            lines.append(json.dumps(log_entry, separators=(",", ":")) + "\n")
+
+        # A single O_APPEND write keeps a run's lines together even when
+        # another rulehawk process is appending to the same log
+        payload = memoryview("".join(lines).encode("utf-8"))
+        fd = os.open(log_dir / "audit.jsonl", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while payload:
+                payload = payload[os.write(fd, payload) :]
+        finally:
+            os.close(fd)
@@ -113,6 +113,17 @@ enabled_rules: all
         }
         self.assertFalse(ConfigLoader.validate(invalid_config))
 
+    def test_validate_protected_branches(self):
+        """Test protected_branches must be a branch name or a list of them"""
+        config = {"ai_provider": "none", "enabled_phases": ["preflight"], "enabled_rules": "all"}
+
+        for value in (["main", "release"], "main"):
+            with self.subTest(value=value):
+                self.assertTrue(ConfigLoader.validate({**config, "protected_branches": value}))
+        for value in ({"main": True}, ["main", 1], 42):
+            with self.subTest(value=value):
+                self.assertFalse(ConfigLoader.validate({**config, "protected_branches": value}))
+
     def test_validate_missing_required_key(self):
         """Test config validation with missing required key"""
         invalid_config = {
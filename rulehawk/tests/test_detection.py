@@ -0,0 +1,97 @@
+"""Tests for RuleHawk Project Detection"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add repository root to path (detection imports its detectors relatively)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rulehawk import detection
+
+
+class TestDetectionCache(unittest.TestCase):
+    """Test caching of detect_project results"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / "pyproject.toml").write_text("[project]\n")
+        detection.invalidate_detection()
+
+        patcher = patch.object(
+            detection,
+            "_detect_project_uncached",
+            side_effect=lambda root: {"language": "python", "tools": {"test": ["pytest"]}},
+        )
+        self.detect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        detection.invalidate_detection()
+        self.temp_dir.cleanup()
+
+    def test_unchanged_project_is_detected_once(self):
+        """Test repeated calls reuse the cached result"""
+        detection.detect_project(self.root)
+        detection.detect_project(self.root)
+
+        self.assertEqual(self.detect.call_count, 1)
+
+    def test_editing_top_level_file_detects_again(self):
+        """Test changing a root file's contents invalidates the result"""
+        detection.detect_project(self.root)
+        (self.root / "pyproject.toml").write_text("[project]\nname = 'changed'\n")
+        detection.detect_project(self.root)
+
+        self.assertEqual(self.detect.call_count, 2)
+
+    def test_adding_top_level_file_detects_again(self):
+        """Test a new root file, such as a lockfile, invalidates the result"""
+        detection.detect_project(self.root)
+        (self.root / "uv.lock").write_text("")
+        detection.detect_project(self.root)
+
+        self.assertEqual(self.detect.call_count, 2)
+
+    def test_result_expires(self):
+        """Test results are detected again once older than the TTL"""
+        with patch.object(detection, "_DETECTION_TTL", 0):
+            detection.detect_project(self.root)
+            detection.detect_project(self.root)
+
+        self.assertEqual(self.detect.call_count, 2)
+
+    def test_invalidate_detection(self):
+        """Test invalidate_detection drops one project's result, or every result"""
+        other = tempfile.TemporaryDirectory()
+        self.addCleanup(other.cleanup)
+        detection.detect_project(self.root)
+        detection.detect_project(Path(other.name))
+
+        detection.invalidate_detection(self.root)
+        detection.detect_project(self.root)
+        detection.detect_project(Path(other.name))
+        self.assertEqual(self.detect.call_count, 3)
+
+        detection.invalidate_detection()
+        detection.detect_project(Path(other.name))
+        self.assertEqual(self.detect.call_count, 4)
+
+    def test_callers_cannot_mutate_cached_result(self):
+        """Test each caller gets its own copy, nested values included"""
+        first = detection.detect_project(self.root)
+        first["language"] = "changed"
+        first["tools"]["test"].append("changed")
+
+        second = detection.detect_project(self.root)
+
+        self.assertEqual(second, {"language": "python", "tools": {"test": ["pytest"]}})
+        self.assertEqual(self.detect.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
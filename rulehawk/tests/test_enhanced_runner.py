@@ -0,0 +1,222 @@
+"""Tests for RuleHawk Enhanced Rule Runner"""
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules.enhanced_runner import (
+    EnhancedRuleRunner,
+    RuleExceptionManager,
+    _command_argv,
+    _parse_ignore_file,
+)
+
+
+class TestRuleExceptionManager(unittest.TestCase):
+    """Test rulehawkignore parsing"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.ignore_file = Path(self.temp_dir.name) / "rulehawkignore"
+        _parse_ignore_file.cache_clear()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def load(self, content):
+        """Write the ignore file and load it, returning the manager and printed warnings"""
+        self.ignore_file.write_text(content)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            manager = RuleExceptionManager(self.ignore_file)
+        return manager, output.getvalue()
+
+    def test_reason_with_colons(self):
+        """Test everything after the rule id is the reason, colons included"""
+        manager, _ = self.load("A1:see https://example.com:8080/issue\n")
+
+        self.assertEqual(manager.exceptions["A1"].reason, "see https://example.com:8080/issue")
+        self.assertIsNone(manager.exceptions["A1"].until_date)
+        self.assertEqual(manager.should_skip("A1"), (True, "see https://example.com:8080/issue"))
+
+    def test_until_with_reason(self):
+        """Test an until= date followed by a reason"""
+        manager, _ = self.load("A1:until=2099-01-05:waiting on: upstream fix\n")
+
+        exception = manager.exceptions["A1"]
+        self.assertEqual(exception.until_date, date(2099, 1, 5))
+        self.assertEqual(exception.reason, "waiting on: upstream fix")
+        self.assertEqual(manager.should_skip("A1"), (True, "waiting on: upstream fix"))
+
+    def test_until_without_reason(self):
+        """Test an until= date alone gets the default reason"""
+        manager, _ = self.load("A1:until=2099-1-5\n")
+
+        self.assertEqual(manager.exceptions["A1"].until_date, date(2099, 1, 5))
+        self.assertEqual(manager.exceptions["A1"].reason, "Temporarily disabled")
+
+    def test_malformed_dates_are_skipped(self):
+        """Test lines with invalid until= dates are dropped with a warning"""
+        manager, warnings = self.load(
+            "A1:until=20990105:basic format\n"
+            "A2:until=2099-W01-1:week date\n"
+            "A3:until=2099-02-30:no such day\n"
+            "A4:until=soon\n"
+        )
+
+        self.assertEqual(manager.exceptions, {})
+        self.assertEqual(warnings.count("Invalid date"), 4)
+
+    def test_expired_date(self):
+        """Test an expired exception no longer skips its rule"""
+        manager, _ = self.load("A1:until=2000-01-01:old\n")
+
+        self.assertEqual(manager.should_skip("A1"), (False, "Exception expired on 2000-01-01"))
+
+    def test_comments_blank_lines_and_ids(self):
+        """Test comments, blank lines and lines without a rule id skip nothing"""
+        lines = [
+            "# A1:commented out",
+            "   # A2:indented comment",
+            "",
+            ":no rule id",
+            "A3",
+            "  A4 : padded id",
+        ]
+        manager, warnings = self.load("\n".join(lines) + "\n")
+
+        self.assertEqual(manager.should_skip("A1"), (False, None))
+        self.assertEqual(manager.should_skip("A2"), (False, None))
+        self.assertEqual(manager.should_skip("A3"), (False, None))
+        self.assertIn("Invalid exception format at line 5", warnings)
+        self.assertEqual(manager.should_skip("A4"), (True, " padded id"))
+
+    def test_missing_file(self):
+        """Test a missing ignore file skips nothing"""
+        manager = RuleExceptionManager(self.ignore_file)
+
+        self.assertEqual(manager.exceptions, {})
+        self.assertEqual(manager.should_skip("A1"), (False, None))
+
+    def test_rewritten_file_is_parsed_again(self):
+        """Test the parse cache is keyed on the file's mtime and size"""
+        manager, _ = self.load("A1:first\n")
+        self.assertEqual(manager.should_skip("A1"), (True, "first"))
+
+        # Same size, so only the mtime tells the two versions apart
+        stat = self.ignore_file.stat()
+        self.ignore_file.write_text("A1:other\n")
+        os.utime(self.ignore_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        manager = RuleExceptionManager(self.ignore_file)
+        self.assertEqual(manager.should_skip("A1"), (True, "other"))
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        """Test loading an unchanged file reuses the cached parse"""
+        self.load("A1:reason\n")
+        RuleExceptionManager(self.ignore_file)
+
+        self.assertEqual(_parse_ignore_file.cache_info().hits, 1)
+
+
+class TestEnhancedRuleRunner(unittest.TestCase):
+    """Test parallel rule checks"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.runner = EnhancedRuleRunner({})
+        self.runner.exception_manager = RuleExceptionManager(
+            Path(self.temp_dir.name) / "rulehawkignore"
+        )
+        self.executed = []
+        self.finished = []
+        self.executed_lock = threading.Lock()
+        self.runner._execute = self.fake_execute
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fake_execute(self, check_command):
+        """Record a check command and pass it after the seconds its last word names"""
+        with self.executed_lock:
+            self.executed.append(check_command)
+        time.sleep(float(check_command.split()[-1]))
+        with self.executed_lock:
+            self.finished.append(check_command)
+        return subprocess.CompletedProcess(check_command, 0, f"ran {check_command}", "")
+
+    @staticmethod
+    def rule(rule_id, check_command):
+        """Build an error-severity rule checked by check_command"""
+        return {"id": rule_id, "name": rule_id, "severity": "error", "check_command": check_command}
+
+    def test_shared_command_runs_once(self):
+        """Test rules with the same check command share a single run"""
+        rules = [
+            self.rule("A1", "lint 0.1"),
+            self.rule("A2", "lint 0.1"),
+            self.rule("A3", "test 0"),
+        ]
+
+        results = self.runner.check_rules(rules)
+
+        self.assertEqual(sorted(self.executed), ["lint 0.1", "test 0"])
+        self.assertEqual(results["passed_count"], 3)
+        self.assertEqual([detail["status"] for detail in results["details"]], ["passed"] * 3)
+
+    def test_results_keep_rule_order(self):
+        """Test results come back in rule order, not completion order"""
+        commands = [f"check {0.05 * (5 - index)}" for index in range(5)]
+        rules = [self.rule(f"R{index}", command) for index, command in enumerate(commands)]
+
+        results = self.runner.check_rules(rules)
+
+        # The slowest checks come first, so overlapping runs finish in reverse
+        self.assertEqual(self.finished, commands[::-1])
+        self.assertEqual(
+            [detail["rule"] for detail in results["details"]], [rule["id"] for rule in rules]
+        )
+
+
+@unittest.skipIf(os.name == "nt", "Windows commands always go through cmd.exe")
+class TestCommandArgv(unittest.TestCase):
+    """Test which check commands run without a shell"""
+
+    def test_simple_commands_are_split(self):
+        """Test plain commands become an argv, honouring quotes"""
+        self.assertEqual(_command_argv("ruff check ."), ("ruff", "check", "."))
+        self.assertEqual(
+            _command_argv("pytest -k 'not slow' tests/"), ("pytest", "-k", "not slow", "tests/")
+        )
+
+    def test_shell_syntax_needs_a_shell(self):
+        """Test pipes, redirects, chaining and other shell syntax return None"""
+        for command in (
+            "ruff check . | tee lint.log",
+            "pytest > out.txt",
+            "pytest 2>&1",
+            "npm ci && npm test",
+            "make lint; make test",
+            "echo $HOME",
+            "ls *.py",
+            "CI=1 pytest",
+            "pytest 'unclosed",
+            "",
+        ):
+            with self.subTest(command=command):
+                self.assertIsNone(_command_argv(command))
+
+
+if __name__ == "__main__":
+    unittest.main()
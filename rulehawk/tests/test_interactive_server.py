@@ -0,0 +1,125 @@
+"""Tests for RuleHawk Interactive MCP Server"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add repository root to path (the server imports memory and tools relatively)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rulehawk.mcp.interactive_server import _MAX_ASKS, InteractiveRuleHawkMCP
+from rulehawk.verifier import VerificationResult
+
+
+class _ToolRecorder:
+    """Stands in for the MCP server, keeping the tools registered on it by name"""
+
+    def __init__(self, name):
+        self.tools = {}
+
+    def tool(self):
+        def register(func):
+            self.tools[func.__name__] = func
+            return func
+
+        return register
+
+
+class TestInteractiveServer(unittest.TestCase):
+    """Test the interactive server's in-memory state"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with patch("rulehawk.mcp.interactive_server.Server", _ToolRecorder):
+            self.mcp = InteractiveRuleHawkMCP(Path(self.temp_dir.name))
+
+    def tearDown(self):
+        self.mcp._memory_executor.shutdown()
+        self.mcp.memory.close()
+        self.temp_dir.cleanup()
+
+    def call(self, tool, *args):
+        """Call a registered tool, returning its result and decoded payload"""
+        result = asyncio.run(self.mcp.server.tools[tool](*args))
+        return result, json.loads(result.content[0].text)
+
+    def test_memory_status_is_reused_until_state_changes(self):
+        """Test get_memory_status is rebuilt only after commands change"""
+        first, payload = self.call("get_memory_status")
+        self.assertEqual(payload["known_commands"], {})
+        self.assertIs(self.call("get_memory_status")[0], first)
+
+        verified = VerificationResult(safe=True, valid=True, duration_ms=5)
+        with patch.object(self.mcp.verifier, "verify_command", return_value=verified):
+            _, taught = self.call("teach_command", {"intent": "test", "command": "pytest"})
+        self.assertEqual(taught["status"], "learned")
+
+        second, payload = self.call("get_memory_status")
+        self.assertIsNot(second, first)
+        self.assertEqual(payload["known_commands"], {"TEST_CMD": "pytest"})
+
+    def test_forget_command_refreshes_memory_status(self):
+        """Test forgetting a command drops it from the cached status"""
+        self.mcp.memory.learn_and_verify("TEST_CMD", "pytest", "test", "exit_code")
+        asyncio.run(self.mcp._refresh_known())
+        self.assertIn("TEST_CMD", self.call("get_memory_status")[1]["known_commands"])
+
+        self.call("forget_command", {"intent": "test"})
+
+        self.assertEqual(self.call("get_memory_status")[1]["known_commands"], {})
+
+    def seed_command(self, confidence):
+        """Store a verified test command with the given confidence and reload the tables"""
+        self.mcp.memory.learned_data["commands"]["TEST_CMD"] = {
+            "command": "pytest",
+            "verified": True,
+            "confidence": confidence,
+        }
+        asyncio.run(self.mcp._refresh_known())
+
+    def test_ask_command_only_offers_trusted_commands(self):
+        """Test ask_command asks again for a command run_command wouldn't use"""
+        self.seed_command(0.6)
+
+        _, payload = self.call("ask_command", {"intent": "test"})
+
+        self.assertEqual(payload["status"], "need_answer")
+        self.assertIn("TEST_CMD", self.call("get_memory_status")[1]["known_commands"])
+
+    def test_ask_command_logs_use_of_trusted_command(self):
+        """Test a trusted command is offered and its use logged"""
+        self.seed_command(0.9)
+
+        _, payload = self.call("ask_command", {"intent": "test"})
+
+        self.assertEqual((payload["status"], payload["command"]), ("already_known", "pytest"))
+        used = [
+            entry for entry in self.mcp.memory.iter_log() if entry["event"] == "USE_LEARNED_CMD"
+        ]
+        self.assertEqual(len(used), 1)
+        self.assertEqual((used[0]["command"], used[0]["confidence"]), ("pytest", 0.9))
+
+    def test_repeated_asks_abort_until_taught(self):
+        """Test ask_command gives up after _MAX_ASKS asks, and teaching resets the count"""
+        for _ in range(_MAX_ASKS):
+            self.assertEqual(
+                self.call("ask_command", {"intent": "lint"})[1]["status"], "need_answer"
+            )
+        self.assertEqual(self.call("ask_command", {"intent": "lint"})[1]["status"], "abort")
+        # Other command types keep their own count
+        self.assertEqual(self.call("ask_command", {"intent": "test"})[1]["status"], "need_answer")
+
+        verified = VerificationResult(safe=True, valid=True, duration_ms=5)
+        with patch.object(self.mcp.verifier, "verify_command", return_value=verified):
+            self.call("teach_command", {"intent": "lint", "command": "ruff check", "save": False})
+
+        self.assertEqual(self.call("ask_command", {"intent": "lint"})[1]["status"], "need_answer")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for RuleHawk Memory"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add repository root to path (memory and the MCP tools import relatively)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rulehawk.mcp import tools
+from rulehawk.memory import RuleHawkMemory
+
+
+class TestRuleHawkMemory(unittest.TestCase):
+    """Test learned command storage"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.memory = RuleHawkMemory(Path(self.temp_dir.name))
+
+    def tearDown(self):
+        self.memory.close()
+        self.temp_dir.cleanup()
+
+    def test_clear_command_invalidates_tool_cache(self):
+        """Test clearing a command forgets cached checks of its tool only"""
+        self.memory.learn_command("TEST_CMD", "pytest -q", "test")
+        path = os.environ.get("PATH", "")
+        tools._tool_cache[("pytest", path)] = (0.0, {"installed": True})
+        tools._tool_cache[("ruff", path)] = (0.0, {"installed": True})
+        self.addCleanup(tools.clear_tool_cache)
+
+        self.memory.clear_command("TEST_CMD", tools.clear_tool_cache)
+
+        self.assertNotIn(("pytest", path), tools._tool_cache)
+        self.assertIn(("ruff", path), tools._tool_cache)
+        self.assertNotIn("TEST_CMD", self.memory.learned_data["commands"])
+
+    def test_save_leaves_no_tmp_file(self):
+        """Test saving swaps the learned file in without leaving its temp file"""
+        self.memory.learn_command("TEST_CMD", "pytest", "test")
+
+        self.assertEqual(list(self.memory.memory_dir.glob("*.tmp")), [])
+        with open(self.memory.learned_file) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["commands"]["TEST_CMD"]["command"], "pytest")
+        self.assertEqual(saved["last_updated_by"], "test")
+
+    @patch("rulehawk.memory._LOG_MAX_BYTES", 200)
+    def test_log_rotates_past_max_bytes(self):
+        """Test the audit log moves to .jsonl.1 once a write crosses the size limit"""
+        rotated = self.memory.log_file.with_name(self.memory.log_file.name + ".1")
+        for index in range(5):
+            self.memory.log_event("OLD", index=index)
+        self.memory.flush_log()
+
+        self.assertTrue(rotated.exists())
+        self.assertFalse(self.memory.log_file.exists())
+
+        self.memory.log_event("NEW")
+        self.memory.flush_log()
+
+        with open(rotated) as f:
+            self.assertEqual([json.loads(line)["index"] for line in f], list(range(5)))
+        with open(self.memory.log_file) as f:
+            self.assertEqual([json.loads(line)["event"] for line in f], ["NEW"])
+
+    def test_iter_log_reads_rotated_log_first(self):
+        """Test iter_log yields the rotated log, then the current one, then buffered events"""
+        rotated = self.memory.log_file.with_name(self.memory.log_file.name + ".1")
+        rotated.write_text('{"event":"FIRST"}\n{"event":"SECOND"}\n{"event":"TRUNC')
+        self.memory.log_file.write_text('\n{"event":"THIRD"}\n')
+        self.memory.log_event("FOURTH")
+
+        with self.assertLogs("rulehawk.memory", level="WARNING"):
+            events = [entry["event"] for entry in self.memory.iter_log()]
+
+        self.assertEqual(events, ["FIRST", "SECOND", "THIRD", "FOURTH"])
+
+    def test_iter_log_without_log(self):
+        """Test iter_log yields nothing before anything is logged"""
+        self.assertEqual(list(self.memory.iter_log()), [])
+
+    def test_log_events_are_buffered_until_flushed(self):
+        """Test events reach the audit log on flush_log, not on every log_event"""
+        self.memory.log_event("BUFFERED", value=1)
+        self.assertFalse(self.memory.log_file.exists())
+
+        self.memory.flush_log()
+
+        with open(self.memory.log_file) as f:
+            entry = json.loads(f.read())
+        self.assertEqual((entry["event"], entry["value"]), ("BUFFERED", 1))
+
+    @patch("rulehawk.memory._LOG_BATCH_SIZE", 2)
+    def test_full_batch_is_written(self):
+        """Test a full batch of events is written without an explicit flush"""
+        self.memory.log_event("ONE")
+        self.assertFalse(self.memory.log_file.exists())
+        self.memory.log_event("TWO")
+
+        with open(self.memory.log_file) as f:
+            self.assertEqual([json.loads(line)["event"] for line in f], ["ONE", "TWO"])
+
+    def test_close_writes_buffered_events_and_pending_changes(self):
+        """Test close flushes buffered events and deferred saves"""
+        self.memory.log_event("BEFORE_CLOSE")
+        self.memory.set_project_info(language="python")
+
+        self.memory.close()
+
+        with open(self.memory.log_file) as f:
+            self.assertEqual(json.loads(f.read())["event"], "BEFORE_CLOSE")
+        with open(self.memory.learned_file) as f:
+            self.assertEqual(json.load(f)["detected"]["language"], "python")
+
+
+if __name__ == "__main__":
+    unittest.main()
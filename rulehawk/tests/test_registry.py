@@ -13,9 +13,10 @@ from rules.registry import RuleRegistry
 class TestRuleRegistry(unittest.TestCase):
     """Test the rule registry functionality"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.registry = RuleRegistry()
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by every test (the registry is read-only)"""
+        cls.registry = RuleRegistry()
 
     def test_registry_loads_rules(self):
         """Test that registry loads rules on initialization"""
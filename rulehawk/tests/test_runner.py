@@ -0,0 +1,115 @@
+"""Tests for RuleHawk Rule Runner"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+# Add repository root to path (the runner imports integrations relatively)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rulehawk.rules.runner import RuleRunner
+
+
+class TestRuleRunner(unittest.TestCase):
+    """Test parallel rule checks"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.runner = RuleRunner({"logging": {"dir": self.temp_dir.name}})
+        self.executed = []
+        self.finished = []
+        self.executed_lock = threading.Lock()
+        self.runner._run_command = self.fake_run_command
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fake_run_command(self, command, timeout=30):
+        """Record a command and pass it after the seconds its last word names"""
+        with self.executed_lock:
+            self.executed.append((command, timeout))
+        time.sleep(float(command.split()[-1]))
+        with self.executed_lock:
+            self.finished.append(command)
+        return True, f"ran {command}"
+
+    @staticmethod
+    def rule(rule_id, check_command, **extra):
+        """Build an error-severity rule checked by check_command"""
+        return {
+            "id": rule_id,
+            "name": rule_id,
+            "severity": "error",
+            "check_command": check_command,
+            **extra,
+        }
+
+    def test_shared_command_runs_once(self):
+        """Test rules with the same check command and timeout share a single run"""
+        rules = [
+            self.rule("A1", "lint 0.1"),
+            self.rule("A2", "lint 0.1"),
+            self.rule("A3", "lint 0.1", timeout_sec=5),
+        ]
+
+        results = self.runner.check_rules(rules)
+
+        self.assertEqual(sorted(self.executed), [("lint 0.1", 5), ("lint 0.1", 30)])
+        self.assertEqual(results["passed_count"], 3)
+        self.assertEqual([detail["message"] for detail in results["details"]], ["ran lint 0.1"] * 3)
+
+    def test_results_keep_rule_order(self):
+        """Test results come back in rule order, not completion order"""
+        commands = [f"check {0.05 * (5 - index)}" for index in range(5)]
+        rules = [self.rule(f"R{index}", command) for index, command in enumerate(commands)]
+
+        results = self.runner.check_rules(rules)
+
+        # The slowest checks come first, so overlapping runs finish in reverse
+        self.assertEqual(self.finished, commands[::-1])
+        self.assertEqual(
+            [detail["rule_id"] for detail in results["details"]], [rule["id"] for rule in rules]
+        )
+
+    def test_auto_fix_runs_checks_one_at_a_time(self):
+        """Test fix runs don't overlap, since fixes rewrite files other checks read"""
+        commands = [f"check {0.02 * (3 - index)}" for index in range(3)]
+        rules = [self.rule(f"R{index}", command) for index, command in enumerate(commands)]
+
+        self.runner.check_rules(rules, auto_fix=True)
+
+        self.assertEqual(self.finished, commands)
+
+
+class TestProtectedBranches(unittest.TestCase):
+    """Test the protected_branches setting"""
+
+    def protected_on(self, branch, protected_branches):
+        """Run the branch protection validator on branch with the given setting"""
+        runner = RuleRunner({"config": {"protected_branches": protected_branches}})
+        status = Mock(stdout=f"# branch.head {branch}\n", stderr="", returncode=0)
+        with patch("subprocess.run", return_value=status):
+            return not runner.validators["check_branch_protection"]({})["success"]
+
+    def test_branch_list(self):
+        """Test listed branches replace the default protected set"""
+        self.assertTrue(self.protected_on("release", ["main", "release"]))
+        self.assertFalse(self.protected_on("master", ["main", "release"]))
+
+    def test_single_branch_name(self):
+        """Test a lone branch name protects that branch, not its letters"""
+        self.assertTrue(self.protected_on("release", "release"))
+        self.assertFalse(self.protected_on("r", "release"))
+
+    def test_invalid_setting_is_rejected(self):
+        """Test a setting that isn't a branch name or list raises"""
+        with self.assertRaises(ValueError):
+            RuleRunner({"protected_branches": {"main": True}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 """Tests for RuleHawk Validators"""
 
+import io
 import os
 import sys
 import unittest
@@ -24,7 +25,9 @@ class TestValidators(unittest.TestCase):
     @patch("subprocess.run")
     def test_check_branch_protection_on_main(self, mock_run):
         """Test branch protection fails on main branch"""
-        mock_run.return_value = Mock(stdout="main\n", stderr="", returncode=0)
+        mock_run.return_value = Mock(
+            stdout="# branch.oid abc123\n# branch.head main\n", stderr="", returncode=0
+        )
 
         result = check_branch_protection({})
 
@@ -35,7 +38,9 @@ class TestValidators(unittest.TestCase):
     @patch("subprocess.run")
     def test_check_branch_protection_on_feature(self, mock_run):
         """Test branch protection passes on feature branch"""
-        mock_run.return_value = Mock(stdout="feature/new-feature\n", stderr="", returncode=0)
+        mock_run.return_value = Mock(
+            stdout="# branch.head feature/new-feature\n", stderr="", returncode=0
+        )
 
         result = check_branch_protection({})
 
@@ -177,26 +182,40 @@ Missing other sections
         self.assertFalse(result["success"])
         self.assertIn("No CI configuration", result["message"])
 
-    @patch("subprocess.run")
-    def test_run_security_phase_clean(self, mock_run):
+    @patch("subprocess.Popen")
+    def test_run_security_phase_clean(self, mock_popen):
         """Test security phase with no issues"""
-        mock_run.return_value = Mock(stdout="All clear - no issues found", stderr="", returncode=0)
+        mock_popen.return_value = Mock(stdout=io.StringIO("All clear - no issues found\n"))
 
         result = run_security_phase({})
 
         self.assertTrue(result["success"])
         self.assertIn("passed", result["message"])
 
-    @patch("subprocess.run")
-    def test_run_security_phase_with_issues(self, mock_run):
+    @patch("subprocess.Popen")
+    def test_run_security_phase_with_issues(self, mock_popen):
         """Test security phase with security issues"""
-        mock_run.return_value = Mock(stdout="Found 2 leaks with 3 secrets", stderr="", returncode=1)
+        mock_popen.return_value = Mock(stdout=io.StringIO("Found 2 leaks with 3 secrets\n"))
 
         result = run_security_phase({})
 
         self.assertFalse(result["success"])
         self.assertIn("Security issues detected", result["message"])
 
+    @patch("threading.Timer")
+    @patch("subprocess.Popen")
+    def test_run_security_phase_timed_out(self, mock_popen, mock_timer):
+        """Test a scan stopped by its watchdog fails even with no issues found so far"""
+        mock_popen.return_value = Mock(stdout=io.StringIO("Scanning...\n"))
+        # The watchdog fires as soon as it starts
+        mock_timer.side_effect = lambda interval, function: Mock(start=function)
+
+        result = run_security_phase({})
+
+        self.assertFalse(result["success"])
+        self.assertIn("timed out", result["message"])
+        mock_popen.return_value.kill.assert_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+"""Tests for RuleHawk Command Verifier"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add repository root to path (the verifier imports rules relatively)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from rulehawk.verifier import CommandVerifier
+
+
+@unittest.skipIf(os.name == "nt", "uses POSIX shell job control")
+class TestCommandVerifier(unittest.TestCase):
+    """Test sandboxed command execution"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.verifier = CommandVerifier(Path(self.temp_dir.name))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @patch("rulehawk.verifier._VERIFY_TIMEOUT", 1)
+    def test_backgrounded_child_does_not_outlive_timeout(self):
+        """Test a command leaving a child on its output pipes times out on time"""
+        start = time.monotonic()
+        result = self.verifier.verify_command("test", "sleep 30 & echo test passed")
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 5)
+        self.assertFalse(result.valid)
+        self.assertEqual(result.reason, "Command timed out during verification")
+
+    @patch("rulehawk.verifier._VERIFY_TIMEOUT", 1)
+    def test_backgrounded_child_without_output_pipes(self):
+        """Test a detached background child doesn't hold up a finished command"""
+        start = time.monotonic()
+        result = self.verifier.verify_command(
+            "test", "sleep 3 >/dev/null 2>&1 & sleep 0.2; echo test passed"
+        )
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 5)
+        self.assertTrue(result.valid)
+        self.assertIn("test passed", result.output_sample)
+
+
+if __name__ == "__main__":
+    unittest.main()
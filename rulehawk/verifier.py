@@ -1,15 +1,52 @@
 """Command verification system for RuleHawk."""
 
+import functools
 import logging
+import os
 import re
 import subprocess
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Pattern, Set, Tuple
+
+from .rules.enhanced_runner import _command_argv, _run_capped
 
 logger = logging.getLogger(__name__)
 
+# Directories left out of file snapshots besides hidden ones: installed
+# dependencies, and bytecode that merely importing a project (e.g. pytest
+# --collect-only) writes
+_SNAPSHOT_SKIPPED_DIRS = frozenset({"node_modules", "__pycache__"})
+
+# Seconds a command may run during verification, background children included
+_VERIFY_TIMEOUT = 10
+
+# Common dry-run flags for various tools, as (tool, flag); the first tool
+# found in a command decides its flag
+_DRY_RUN_FLAGS = (
+    ("pytest", "--collect-only"),
+    ("ruff", "--no-fix"),
+    ("black", "--check"),
+    ("prettier", "--check"),
+    ("eslint", "--no-fix"),
+    ("npm test", "-- --listTests"),
+    ("make", "-n"),
+    ("cargo", "--dry-run"),
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _any_pattern_re(patterns: Tuple[str, ...]) -> Pattern[str]:
+    """Compile patterns into one case-insensitive regex matching any of them"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=32)
+def _keyword_re(keywords: Tuple[str, ...]) -> Pattern[str]:
+    """Compile literal keywords into one regex matching any of them"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
 
 @dataclass
 class VerificationResult:
@@ -40,6 +77,14 @@ class CommandVerifier:
         r"rm\s+-rf\s+\*",  # Remove everything in current dir
         r">\s*/etc/",  # Overwriting system files
     ]
+    # Casefolded substrings at least one of which every pattern above needs
+    # (the fork bomb pattern's bare | splits it into ":{ :" and ":& };:"),
+    # so most commands are cleared without running the regex
+    _DANGER_TOKENS = ("rm", "dd", "mkfs", "chmod", "curl", "wget", ">", ":{", ":&")
+    # All of the patterns as one alternation, so a command is scanned once
+    _DANGEROUS_RE = re.compile(
+        "|".join(f"(?:{pattern})" for pattern in DANGEROUS_PATTERNS), re.IGNORECASE
+    )
 
     # Command type validation rules
     COMMAND_VALIDATORS = {
@@ -88,6 +133,13 @@ class CommandVerifier:
         },
     }
 
+    # Unknown command type, be conservative
+    UNKNOWN_COMMAND_VALIDATORS = {
+        "must_not_contain": ["rm", "delete", "sudo"],
+        "expected_duration": (10, 600000),
+        "modifies_files": False,
+    }
+
     def __init__(self, project_root: Path):
         """Initialize verifier.
 
@@ -106,29 +158,40 @@ class CommandVerifier:
         Returns:
             VerificationResult with safety and validity information
         """
+        return self._verify_command(command_type, command)[0]
+
+    def _verify_command(
+        self, command_type: str, command: str, files_before: Optional[Set[Tuple[str, int]]] = None
+    ) -> Tuple[VerificationResult, Optional[Set[Tuple[str, int]]]]:
+        """Verify a command, reusing a file snapshot taken before it.
+
+        Args:
+            command_type: Type of command (test, lint, format, etc.)
+            command: Command string to verify
+            files_before: Current file snapshot, if one is already known
+
+        Returns:
+            VerificationResult, and the file snapshot taken after the
+            command ran (None if it didn't run that far)
+        """
         # Step 1: Safety check
         if self.is_dangerous(command):
-            return VerificationResult(safe=False, reason="Command contains dangerous patterns")
+            return VerificationResult(
+                safe=False, reason="Command contains dangerous patterns"
+            ), None
 
         # Step 2: Get validation rules for this command type
-        validators = self.COMMAND_VALIDATORS.get(command_type.lower().replace("_cmd", ""))
-        if not validators:
-            # Unknown command type, be conservative
-            validators = {
-                "must_not_contain": ["rm", "delete", "sudo"],
-                "expected_duration": (10, 600000),
-                "modifies_files": False,
-            }
+        validators = self.COMMAND_VALIDATORS.get(
+            command_type.lower().replace("_cmd", ""), self.UNKNOWN_COMMAND_VALIDATORS
+        )
 
         # Step 3: Basic validation
         validation_result = self._validate_against_rules(command, validators)
         if not validation_result.valid:
-            return validation_result
+            return validation_result, None
 
         # Step 4: Dry run or sandbox execution
-        execution_result = self._execute_sandboxed(command, validators)
-
-        return execution_result
+        return self._execute_sandboxed(command, validators, files_before)
 
     def is_dangerous(self, command: str) -> bool:
         """Check if command contains dangerous patterns.
@@ -139,11 +202,20 @@ class CommandVerifier:
         Returns:
             True if dangerous patterns detected
         """
+        # casefold, not lower, so the prefilter also sees the non-ASCII
+        # letters (e.g. the long s) that re.IGNORECASE treats as ASCII ones
+        command_folded = command.casefold()
+        if not any(token in command_folded for token in self._DANGER_TOKENS):
+            return False
+        if not self._DANGEROUS_RE.search(command):
+            return False
+
+        # Rare path: find which pattern matched for the log
         for pattern in self.DANGEROUS_PATTERNS:
             if re.search(pattern, command, re.IGNORECASE):
                 logger.warning(f"Dangerous pattern detected in command: {pattern}")
-                return True
-        return False
+                break
+        return True
 
     def _validate_against_rules(self, command: str, validators: dict) -> VerificationResult:
         """Validate command against type-specific rules.
@@ -160,7 +232,7 @@ class CommandVerifier:
         # Check for required keywords
         must_contain = validators.get("must_contain", [])
         if must_contain:
-            if not any(keyword in command_lower for keyword in must_contain):
+            if not _keyword_re(tuple(must_contain)).search(command_lower):
                 return VerificationResult(
                     safe=True,
                     valid=False,
@@ -169,44 +241,51 @@ class CommandVerifier:
 
         # Check for forbidden keywords
         must_not_contain = validators.get("must_not_contain", [])
-        for forbidden in must_not_contain:
-            if forbidden in command_lower:
-                return VerificationResult(
-                    safe=True,
-                    valid=False,
-                    reason=f"Command contains forbidden keyword: {forbidden}",
-                )
+        if must_not_contain and _keyword_re(tuple(must_not_contain)).search(command_lower):
+            # Report the first forbidden keyword in list order, not in the command
+            forbidden = next(keyword for keyword in must_not_contain if keyword in command_lower)
+            return VerificationResult(
+                safe=True,
+                valid=False,
+                reason=f"Command contains forbidden keyword: {forbidden}",
+            )
 
         return VerificationResult(safe=True, valid=True)
 
-    def _execute_sandboxed(self, command: str, validators: dict) -> VerificationResult:
+    def _execute_sandboxed(
+        self, command: str, validators: dict, files_before: Optional[Set[Tuple[str, int]]] = None
+    ) -> Tuple[VerificationResult, Optional[Set[Tuple[str, int]]]]:
         """Execute command in sandboxed way to verify behavior.
 
         Args:
             command: Command to execute
             validators: Validation rules including expected behavior
+            files_before: File snapshot to compare against, if one was
+                taken since the tree last changed
 
         Returns:
-            VerificationResult with execution details
+            VerificationResult with execution details, and the file snapshot
+            taken after the command ran (None if it wasn't)
         """
         # Track files before execution
-        files_before = self._get_file_snapshot()
+        if files_before is None:
+            files_before = self._get_file_snapshot()
+        files_after = None
 
         try:
             # Add dry-run flags if possible
             dry_run_command = self._add_dry_run_flags(command)
 
-            # Execute with timeout
-            start_time = time.time()
-            result = subprocess.run(
-                dry_run_command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10,  # 10 second timeout for verification
+            # Execute with timeout, without a shell unless the command needs one
+            argv = _command_argv(dry_run_command)
+            start_time = time.perf_counter_ns()
+            result = _run_capped(
+                argv if argv is not None else dry_run_command,
+                shell=argv is None,
+                timeout=_VERIFY_TIMEOUT,
                 cwd=self.project_root,
             )
-            duration_ms = int((time.time() - start_time) * 1000)
+            duration_ms = (time.perf_counter_ns() - start_time) // 1_000_000
 
             # Check output against expected patterns
             output = result.stdout + result.stderr
@@ -215,9 +294,7 @@ class CommandVerifier:
             # Check for expected output patterns
             expected_patterns = validators.get("expected_output_patterns", [])
             if expected_patterns:
-                has_expected_output = any(
-                    re.search(pattern, output, re.IGNORECASE) for pattern in expected_patterns
-                )
+                has_expected_output = _any_pattern_re(tuple(expected_patterns)).search(output)
 
                 if not has_expected_output:
                     return VerificationResult(
@@ -226,11 +303,17 @@ class CommandVerifier:
                         reason="Output doesn't match expected patterns",
                         output_sample=output_sample,
                         duration_ms=duration_ms,
-                    )
+                    ), files_after
 
             # Check file modifications
             files_after = self._get_file_snapshot()
-            files_modified = len(files_before.symmetric_difference(files_after))
+            # An unchanged tree (the usual case) is confirmed by lookups alone,
+            # without building a difference set
+            files_modified = (
+                0
+                if files_after == files_before
+                else len(files_before.symmetric_difference(files_after))
+            )
 
             if not validators.get("modifies_files", False) and files_modified > 0:
                 return VerificationResult(
@@ -239,7 +322,7 @@ class CommandVerifier:
                     reason=f"Command modified {files_modified} files when it shouldn't",
                     files_modified=files_modified,
                     duration_ms=duration_ms,
-                )
+                ), files_after
 
             # Check duration is reasonable
             min_duration, max_duration = validators.get("expected_duration", (0, 600000))
@@ -249,14 +332,14 @@ class CommandVerifier:
                     valid=False,
                     reason="Command completed too quickly, might not be doing real work",
                     duration_ms=duration_ms,
-                )
+                ), files_after
             elif duration_ms > max_duration:
                 return VerificationResult(
                     safe=True,
                     valid=False,
                     reason="Command took too long, might be stuck",
                     duration_ms=duration_ms,
-                )
+                ), files_after
 
             return VerificationResult(
                 safe=True,
@@ -264,16 +347,20 @@ class CommandVerifier:
                 output_sample=output_sample,
                 duration_ms=duration_ms,
                 files_modified=files_modified,
-            )
+            ), files_after
 
         except subprocess.TimeoutExpired:
             return VerificationResult(
                 safe=True, valid=False, reason="Command timed out during verification"
-            )
+            ), files_after
+        except FileNotFoundError:
+            return VerificationResult(
+                safe=True, valid=False, reason=f"Command not found: {argv[0] if argv else command}"
+            ), files_after
         except Exception as e:
             return VerificationResult(
                 safe=True, valid=False, reason=f"Error during verification: {e}"
-            )
+            ), files_after
 
     def _add_dry_run_flags(self, command: str) -> str:
         """Add dry-run flags to command if possible.
@@ -284,19 +371,7 @@ class CommandVerifier:
         Returns:
             Command with dry-run flags if applicable
         """
-        # Common dry-run flags for various tools
-        dry_run_mappings = {
-            "pytest": "--collect-only",
-            "ruff": "--no-fix",
-            "black": "--check",
-            "prettier": "--check",
-            "eslint": "--no-fix",
-            "npm test": "-- --listTests",
-            "make": "-n",
-            "cargo": "--dry-run",
-        }
-
-        for tool, flag in dry_run_mappings.items():
+        for tool, flag in _DRY_RUN_FLAGS:
             if tool in command and flag not in command:
                 # Add dry-run flag
                 if " -- " in command:
@@ -308,20 +383,42 @@ class CommandVerifier:
 
         return command
 
-    def _get_file_snapshot(self) -> set:
+    def _get_file_snapshot(self) -> Set[Tuple[str, int]]:
         """Get snapshot of files in project.
 
+        Hidden files and directories (such as .git) are skipped, and neither
+        they nor dependency and bytecode cache directories are descended into.
+        Symlinks to directories and mount points (other filesystems, which
+        may be slow or dead network shares) are not followed.
+
         Returns:
-            Set of file paths with modification times
+            Set of (file path, modification time in ns) pairs
         """
         snapshot = set()
-        for path in self.project_root.rglob("*"):
-            if path.is_file() and not any(p.startswith(".") for p in path.parts):
-                try:
-                    mtime = path.stat().st_mtime
-                    snapshot.add(f"{path}:{mtime}")
-                except:
-                    pass
+        try:
+            root_device = os.stat(self.project_root).st_dev
+        except OSError:
+            return snapshot
+        pending = [str(self.project_root)]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("."):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if (
+                                    entry.name not in _SNAPSHOT_SKIPPED_DIRS
+                                    and entry.stat(follow_symlinks=False).st_dev == root_device
+                                ):
+                                    pending.append(entry.path)
+                            elif entry.is_file():
+                                snapshot.add((entry.path, entry.stat().st_mtime_ns))
+                        except OSError:
+                            pass
+            except OSError:
+                pass
         return snapshot
 
     def verify_batch(self, commands: Dict[str, str]) -> Dict[str, VerificationResult]:
@@ -334,7 +431,10 @@ class CommandVerifier:
             Dictionary of command_type -> VerificationResult
         """
         results = {}
+        # The snapshot after one command is the snapshot before the next, so
+        # each command costs one tree walk instead of two
+        snapshot = None
         for cmd_type, command in commands.items():
             logger.info(f"Verifying {cmd_type}: {command}")
-            results[cmd_type] = self.verify_command(cmd_type, command)
+            results[cmd_type], snapshot = self._verify_command(cmd_type, command, snapshot)
         return results